@@ -0,0 +1,29 @@
+#armap draws Dwarf Fortress worlds exported by exportlegends.lua
+#Submodules that need cv2, numpy or PIL are only imported on first use, so importing armap for the palettes
+#or the helpers does not pay for them
+
+import importlib
+
+_lazy = {
+    "test_image": "functions",
+    "blue_conversion": "functions",
+    "palette_dict": "palettes",
+    "ent_colors": "palettes",
+    "generate": "render",
+    "generate_all": "render",
+    "render_world": "render",
+    "preview": "preview",
+    "crop": "crop",
+    "farm": "farm",
+    "diff": "diff",
+    "watch": "watch",
+    "timeline": "timeline",
+}
+
+def __getattr__(name):
+    if name in _lazy:
+        return getattr(importlib.import_module("." + _lazy[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + list(_lazy))
@@ -0,0 +1,83 @@
+import os
+import argparse
+
+from . import config
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="armap", description="Render the worlds in Map Data into Maps.")
+    parser.add_argument("folders", nargs="*", help="folders in Map Data to render (default: all of them)")
+    parser.add_argument("--watch", action="store_true", help="keep running and render new folders as they land")
+    parser.add_argument("--timeline", action="store_true", help="animate how territories changed over the years instead of drawing maps")
+    parser.add_argument("--preview", action="store_true", help="draw every palette small onto one contact sheet instead of the full maps")
+    parser.add_argument("--crop", metavar="X0,Y0,X1,Y1", help="only draw this rectangle of the map, in pixels")
+    parser.add_argument("--crop-tiles", metavar="X0,Y0,X1,Y1", help="only draw this rectangle of the map, in world tiles")
+    parser.add_argument("--civ", help="only draw the area held by this civ id")
+    parser.add_argument("--diff", metavar="PREVIOUS", help="reuse what the folders share with PREVIOUS, an older export of the same world drawn before")
+    parser.add_argument("--farm", action="store_true", help="render (world, palette) jobs from the queue shared with the other machines")
+    parser.add_argument("--serve", action="store_true", help="serve maps over HTTP instead of writing them to Maps")
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        from .server import serve
+        serve()
+        return
+
+    if config.watch_mode or args.watch:
+        from .watch import watch
+        watch()
+        return
+
+    folders = args.folders or [f for f in os.listdir(config.root_path) if os.path.isdir(config.root_path + f)]
+
+    if "Complete" in folders:
+        folders.remove("Complete")
+
+    if folders == []:
+        print("No map data folders present.")
+
+    if args.timeline:
+        from .timeline import timeline
+        for folder in folders:
+            timeline(folder)
+        print("Done!")
+        return
+
+    if args.diff:
+        from .diff import diff
+        for folder in folders:
+            diff(folder, args.diff)
+        print("Done!")
+        return
+
+    if args.farm:
+        from .farm import farm
+        farm(folders)
+        print("Done!")
+        return
+
+    if args.crop or args.crop_tiles or args.civ:
+        from .crop import crop
+        rect = tuple(int(v) for v in args.crop.split(",")) if args.crop else None
+        tiles = tuple(int(v) for v in args.crop_tiles.split(",")) if args.crop_tiles else None
+        for folder in folders:
+            crop(folder, rect=rect, tiles=tiles, civ=args.civ)
+        print("Done!")
+        return
+
+    if args.preview:
+        from .preview import preview
+        for folder in folders:
+            preview(folder)
+        print("Done!")
+        return
+
+    from .render import generate_all
+    generate_all(folders)
+    print("Done!")
+    if config.show_maps:
+        import cv2 as cv
+        cv.waitKey(0)
+
+if __name__ == "__main__":
+    main()
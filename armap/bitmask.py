@@ -0,0 +1,55 @@
+import numpy as np
+
+
+#%%%BIT MASKS
+popcount = np.array([bin(i).count("1") for i in range(256)], np.uint8)
+
+class BitMask:
+    #A 0/255 mask packed 8 pixels to a byte along each row, unpacked only for the OpenCV calls that need it
+    __slots__ = ("bits","shape")
+
+    def __init__(self, bits, shape):
+        self.bits = bits
+        self.shape = tuple(shape)
+
+    @classmethod
+    def pack(cls, mask):
+        #Any nonzero pixel is set
+        return cls(np.packbits(mask, axis=1), mask.shape[:2])
+
+    @classmethod
+    def zeros(cls, shape):
+        return cls(np.zeros((shape[0],(shape[1]+7)//8), np.uint8), shape[:2])
+
+    def unpack(self):
+        mask = np.unpackbits(self.bits, axis=1, count=self.shape[1])
+        mask *= 255
+        return mask
+
+    def __and__(self, other):
+        return BitMask(self.bits & other.bits, self.shape)
+
+    def __or__(self, other):
+        return BitMask(self.bits | other.bits, self.shape)
+
+    def andnot(self, other):
+        return BitMask(self.bits & ~other.bits, self.shape)
+
+    def __invert__(self):
+        bits = ~self.bits
+        if(self.shape[1] % 8):
+            bits[:,-1] &= np.uint8((0xff << (8 - self.shape[1] % 8)) & 0xff) #keep the row padding clear for count()
+        return BitMask(bits, self.shape)
+
+    def count(self):
+        return int(popcount[self.bits].sum(dtype=np.int64))
+
+    def any(self):
+        return bool(self.bits.any())
+
+    def get(self, x, y):
+        return bool(self.bits[y, x >> 3] & (0x80 >> (x & 7)))
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
@@ -0,0 +1,122 @@
+#Everything here is plain python so importing armap stays cheap, edit these to change how the maps are drawn
+import os
+
+#%%OPTIONS
+min_cities = 5
+mandatory_cities = []#["leafscourge","cloudystable","snarlyelled","basiclie","menacethieves","entryamused","relicrift","raptorcrown","basisgoal","blazesmobs","pearlwire","boardplan"] #in english
+
+sea_level_color = (44,64,75)
+#topology_color = (88,127,150) #The topology lines
+topology_color = (57,62,71) #The topology lines
+#bathy_color = (color[0][2]*0.9,color[0][1]*0.9,color[0][0]*0.9,128)
+
+#vill_color = (64,64,64)
+ag_color = (64,85,64)
+path_color = (64,64,64)
+
+glac_alpha = 0.7
+desert_alpha = 1
+veg_green = .8
+veg_alpha = 1
+palette_gradient = False #blend linearly between the palette breakpoints instead of flat bands
+terr_alpha = 0.3
+vill_alpha = 0.3
+ag_alpha = 0.1
+glow_alpha = 0.7
+topology_alpha = 0.5
+
+big_point = 3
+med_point = 2
+small_point = 1
+label_pcolor = (0,0,0)
+point_pcolor = (64,64,64)
+
+
+title_size = 300
+subtitle_size = 100
+font_size = 20
+sub_size = 14
+font_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "DF_Curses_8x12.ttf") #fonts are only loaded once a map needs them
+
+text_offset = (10,5)
+label_budget = 0.5 #seconds the label placement may spend moving labels aside to fit in the ones that clashed
+titleadjust = (20,10)
+title_align = "tm"
+title_draw = True #crops leave it out, the title would land wherever the window happens to end
+
+label_color = (255,255,255)
+blur_color = (0,0,0,255)
+glyph_atlas = False #draw text from pre-rasterized glyphs with all labels blurred and composited in one layer, faster but shadows over the title come out a little different
+
+brook = False
+process_road = True
+draw_offramps = True #link sites in farmland to the road running past them
+
+svg_export = False #also write a vector map of the bands, isolines, rivers, borders and labels
+isoline_epsilon = 0 #approxPolyDP tolerance in pixels for the cached isolines, 0 keeps them exact
+isoline_worlds = 4 #elevation layers whose traced isolines stay in memory, the server and farm draw several worlds
+
+legends_backend = "dict" #"sqlite" keeps the legends in an indexed database beside the export, for big worlds
+
+mand_pop = 1000
+mandatory_cities = [x.lower() for x in mandatory_cities]
+
+
+ice_bgr = [255,255,255]
+desert_bgr = [175,201,237]
+#print(cv.__version__)
+
+
+# grid_check = input("Draw grid?")
+
+# if grid_check.lower() == "y":
+#     grid_draw = True
+# else:
+#     grid_draw = False
+
+#%%%GEN FUNCTION FLAGS
+grid_draw = False
+site_check = False
+territory_check = False
+structure_check = False
+other_labels_check = False
+world_label_check = False
+veg_type = "Green"
+show_maps = True #open every finished map in the image viewer
+
+watch_mode = False #keep running and render each new folder in Map Data as it lands (or pass --watch)
+watch_interval = 5 #seconds between scans of Map Data
+watch_settle = 30 #seconds a folder's files must stay unchanged before it is rendered
+
+output_format = "png" #"png", "png-fast" (zlib level 1), "png-quantized" (256 colors) or "webp" (lossless)
+output_workers = 2 #threads encoding finished maps while the next palette is drawn
+output_queue = 2 #finished maps held for encoding at once, drawing waits when they are all taken
+
+stage_workers = 4 #threads building the parts of a map that do not depend on each other, 1 builds them one after another
+prefetch_depth = 1 #worlds loaded in the background ahead of the one being drawn, 0 loads each world only when its turn comes
+
+preview_factor = 4 #--preview draws every palette this many times smaller onto one contact sheet in Maps
+draw_scale = 1 #the drawing's pixel sizes are divided by this, the preview sets it to preview_factor
+
+crop_halo = 128 #pixels drawn around a crop (--crop, --crop-tiles, --civ) and cut away, so its edges match the full map
+
+diff_tile = 64 #--diff compares two exports of a world in tiles of this many pixels
+diff_max_changed = 0.5 #share of changed tiles above which the base is redrawn whole instead of patched
+
+stage_cache = True #keep each drawing stage in <world>/stages/ so a rerun only redraws what its changed options affect, 0.8 to 2.4 MB for a 400x400 world
+
+server_host = "127.0.0.1" #--serve answers GET /render?world=<folder>&palette=<palette> here
+server_port = 8000
+server_cache_mb = 1024 #decoded layers, stages and isolines of the worlds the server keeps loaded, the least recently drawn go first
+
+timeline_format = "gif" #"png" for a frame per year in Maps/<world> - timeline/, "gif" or "mp4" for one animation (or pass --timeline)
+timeline_palette = "shadowfox"
+timeline_step = 1 #years per frame
+timeline_fps = 10
+
+root_path = "Map Data/"
+output_path = "Maps/"
+farm_queue = root_path + "farm.sqlite" #--farm workers on every machine share this queue of (world, palette) jobs
+farm_heartbeat = 10 #seconds between a worker's heartbeats on the job it holds
+farm_stale = 120 #seconds without a heartbeat before a job is handed to another worker
+farm_retries = 3 #failures before a job is given up on
@@ -0,0 +1,95 @@
+from . import config
+from .palettes import palette_dict
+from .layers import layer_cache, derived_layers, load_layer
+from .stages import StageCache
+from .output import MapWriter
+from .render import find_files, world_names, read_world, draw_map
+from .timeline import pad_rect, terr_reach
+
+
+#%%%CROP
+tile_px = 16 #map pixels per world tile
+
+def site_center(site):
+    ((x1,y1),(x2,y2)) = site["rect"]
+    return (int((int(x1)+int(x2))/2),int((int(y1)+int(y2))/2))
+
+def civ_rect(world, civ, shape):
+    #Every site the civ holds, with room for the territory drawn around them
+    centers = [site_center(s) for s in world["occ_sites"].values() if str(s["ruler"]) == str(civ)]
+    if(centers == []):
+        raise ValueError(f"Civ {civ} holds no sites")
+    xs = [x for (x,y) in centers]
+    ys = [y for (x,y) in centers]
+    return pad_rect((min(xs),min(ys),max(xs)+1,max(ys)+1),terr_reach,shape)
+
+def crop_world(world, window):
+    #Only the sites inside the window, moved to window pixels, and only the civs that still hold one of them
+    (x0,y0,x1,y1) = window
+    d_sites = {}
+    for s,site in world["d_sites"].items():
+        (x,y) = site_center(site)
+        if(x0 <= x < x1 and y0 <= y < y1):
+            ((a1,b1),(a2,b2)) = site["rect"]
+            d_sites[s] = dict(site, rect=[[int(a1)-x0,int(b1)-y0],[int(a2)-x0,int(b2)-y0]])
+    occ_sites = {s:d_sites[s] for s in world["occ_sites"] if s in d_sites}
+    rulers = {site["ruler"] for site in occ_sites.values()}
+    ents = {e:n for e,n in world["ents"].items() if e in rulers}
+    return dict(world, d_sites=d_sites, occ_sites=occ_sites, ents=ents)
+
+def crop(folder, rect=None, tiles=None, civ=None):
+    #rect is in map pixels and tiles in world tiles, both (x0,y0,x1,y1), or civ picks the area one civ holds
+    print("Beginning crop of "+folder)
+    layer_cache.clear()
+    (file_path, fn, flegends, pops, wh) = find_files(folder)
+    stages = StageCache(file_path + "stages/", dict(fn, legends=flegends, pops=pops))
+    stages.key("legends")
+    world = stages.memo("legends", read_world, file_path, flegends, pops)
+    (worldtransname, worldname) = world_names(wh)
+    shape = load_layer(fn, "el").shape[:2]
+    if(civ is not None and str(civ) not in world["ents"]):
+        print(f"ERROR: No civ {civ} holds sites in {worldtransname}, the civs are {', '.join(sorted(world['ents'], key=int)) or 'none'}")
+        return
+    if civ is not None:
+        rect = civ_rect(world, civ, shape)
+        name = f"civ {civ}"
+        asked = name
+    else:
+        if tiles is not None:
+            rect = tuple(v*tile_px for v in tiles)
+        asked = rect
+        rect = pad_rect(rect, 0, shape)
+        name = "{}_{}_{}_{}".format(*rect)
+    if(rect[0] >= rect[2] or rect[1] >= rect[3]):
+        print(f"ERROR: Crop {asked} is outside the {shape[1]}x{shape[0]} map")
+        return
+    #The halo is drawn and cut away again, so territories and roads along the edge come out as in the full map
+    window = pad_rect(rect, config.crop_halo, shape)
+    (x0,y0,x1,y1) = window
+    print(f"Cropping {rect} from a {x1-x0}x{y1-y0} window")
+    small = derived_layers(fn, file_path + "crop/", "{}_{}_{}_{}".format(*window), lambda key, img: img[y0:y1,x0:x1])
+    #Crops keep their own stages so they never push out the full map's
+    small_stages = StageCache(file_path + "crop/stages/", dict(small, legends=flegends, pops=pops))
+    small_stages.key("legends")
+    small_world = crop_world(world, window)
+    box = (rect[0]-x0, rect[1]-y0, rect[2]-x0, rect[3]-y0)
+    saved = {n:getattr(config, n) for n in ["title_draw","mandatory_cities"]}
+    writer = MapWriter()
+    try:
+        config.title_draw = False
+        config.mandatory_cities = saved["mandatory_cities"] + world["mandatory"]
+        for palette in palette_dict:
+            print(f"Beginning {palette} crop")
+            (im, state, svg_layers) = draw_map(palette, small, small_world, (worldtransname, worldname), small_stages)
+            im = im.crop(box)
+            if config.show_maps:
+                im.show()
+            writer.save(im, f"{config.output_path}{worldtransname} - {palette} - {name}")
+            print(f"{palette} crop generated.")
+    finally:
+        for n in saved:
+            setattr(config, n, saved[n])
+        writer.close()
+        layer_cache.clear()
+    print(f"All crops generated for {worldtransname}")
+    print("---------------------------")
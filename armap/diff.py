@@ -0,0 +1,122 @@
+import hashlib
+import cv2 as cv
+import numpy as np
+
+from . import config
+from .palettes import palette_dict, ent_colors
+from .layers import layer_cache, derived_layers, decode_layer, load_layer
+from .stages import StageCache, stage_graph
+from .bitmask import BitMask
+from .render import find_files, draw_base, generate
+from .timeline import pad_rect
+
+
+#%%%DIFF
+#A newer export of a world mostly repeats the older one, so its stage cache is seeded from the older one's before drawing
+shared_stages = ["legends","roads"] #stages kept once per world, the rest once per palette
+diff_reach = 4 #pixels around a changed pixel whose base can change: the 3x3 opening and the isolines along it
+diff_context = 8 #pixels drawn around a patch so its edges come out as in a whole redraw
+
+def file_digest(path):
+    h = hashlib.sha1()
+    with open(path,"rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.digest()
+
+def input_digest(fn, key):
+    #Layers are compared decoded, so a raw export and a BMP of the same map match
+    if key in ["legends","pops"]:
+        return file_digest(fn[key])
+    return file_digest(decode_layer(fn, key))
+
+def changed_tiles(old_fn, new_fn, keys):
+    #diff_tile sized tiles where any of the layers differ, None when the maps are not the same size
+    t = config.diff_tile
+    shape = load_layer(new_fn, "el").shape[:2]
+    if(load_layer(old_fn, "el").shape[:2] != shape):
+        return None
+    (ny, nx) = (-(-shape[0]//t), -(-shape[1]//t))
+    grid = np.zeros((ny,nx), bool)
+    for key in keys:
+        if(input_digest(old_fn, key) == input_digest(new_fn, key)):
+            continue
+        d = np.asarray(load_layer(old_fn, key)) != np.asarray(load_layer(new_fn, key))
+        if(d.ndim == 3):
+            d = d.any(axis=2)
+        padded = np.zeros((ny*t,nx*t), bool)
+        padded[:shape[0],:shape[1]] = d
+        tiles = padded.reshape(ny,t,nx,t).any(axis=(1,3))
+        print(f"{key}: {np.count_nonzero(tiles)} of {ny*nx} tiles changed")
+        grid |= tiles
+    return grid
+
+def tile_boxes(grid, shape):
+    #Touching changed tiles are patched together, one box per group in map pixels
+    t = config.diff_tile
+    (n, labels, stats, centroids) = cv.connectedComponentsWithStats(np.uint8(grid), connectivity=8)
+    return [pad_rect((x*t, y*t, (x+w)*t, (y+h)*t), 0, shape) for (x,y,w,h,a) in stats[1:]]
+
+def patch_base(state, fn, file_path, color, boxes):
+    #Redraws the base only around the changed tiles, every box from a window a little bigger than what is kept
+    canv = state["canv"].copy()
+    land = state["land"].unpack()
+    shape = canv.shape[:2]
+    for box in boxes:
+        (px0,py0,px1,py1) = pad_rect(box, diff_reach, shape)
+        (x0,y0,x1,y1) = window = pad_rect((px0,py0,px1,py1), diff_context, shape)
+        small = derived_layers(fn, file_path + "diff/", "{}_{}_{}_{}".format(*window), lambda key, img: img[y0:y1,x0:x1])
+        (patch, t) = draw_base(small, color, {"rivers":[],"paths":[],"borders":[]})
+        canv[py0:py1,px0:px1] = patch[py0-y0:py1-y0,px0-x0:px1-x0]
+        land[py0:py1,px0:px1] = t[73].unpack()[py0-y0:py1-y0,px0-x0:px1-x0]
+    #The whole map's isolines are not known after a patch, the next palettes trace their own
+    return dict(state, canv=canv, land=BitMask.pack(land), isolines={})
+
+def stage_keys(stages, color):
+    #Same keys draw_map gives the stages
+    stages.key("legends")
+    stages.key("base", sorted(color.items()))
+    stages.key("territory", ent_colors)
+    stages.key("roads")
+    stages.key("structures")
+    stages.key("grid")
+
+def diff(folder, previous):
+    #folder is drawn reusing what it shares with previous, an older export of the same world that was drawn before
+    print(f"Comparing {folder} with {previous}")
+    if not config.stage_cache:
+        print("The diff reuses the stage cache, set stage_cache = True for both exports. Drawing everything.")
+        return generate(folder)
+    layer_cache.clear()
+    (file_path, fn, flegends, pops, wh) = find_files(folder)
+    (old_path, old_fn, old_legends, old_pops, old_wh) = find_files(previous)
+    new = StageCache(file_path + "stages/", dict(fn, legends=flegends, pops=pops))
+    old = StageCache(old_path + "stages/", dict(old_fn, legends=old_legends, pops=old_pops))
+    #Which inputs are unchanged, and so which stages can be copied over as they are
+    same_files = {key:input_digest(dict(old_fn, legends=old_legends, pops=old_pops), key) == input_digest(dict(fn, legends=flegends, pops=pops), key)
+                  for key in ["legends","pops"] + [key for key in fn if key in old_fn]}
+    same = {}
+    for (name, (files, names, upstream)) in stage_graph.items():
+        same[name] = all(same_files.get(f, False) for f in files) and all(same[u] for u in upstream)
+    print("Unchanged stages:", ", ".join(name for name in same if same[name]) or "none")
+    grid = None if same["base"] else changed_tiles(old_fn, fn, stage_graph["base"][0])
+    boxes = None if grid is None else tile_boxes(grid, load_layer(fn, "el").shape[:2])
+    reused = 0
+    patched = 0
+    for (palette, color) in palette_dict.items():
+        stage_keys(new, color)
+        stage_keys(old, color)
+        for name in stage_graph:
+            tag = "" if name in shared_stages else palette
+            if(new.cached(name, tag) or not old.cached(name, tag)):
+                continue
+            if same[name]:
+                new.store(name, old.load(name, tag), tag)
+                reused += 1
+            elif(name == "base" and boxes is not None and not config.svg_export and np.count_nonzero(grid) <= config.diff_max_changed*grid.size):
+                print(f"Patching {palette} base in {len(boxes)} places")
+                new.store(name, patch_base(old.load(name, tag), fn, file_path, color, boxes), tag)
+                patched += 1
+    print(f"Reused {reused} stages and patched {patched}, drawing the rest")
+    layer_cache.clear()
+    generate(folder)
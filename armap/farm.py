@@ -0,0 +1,136 @@
+import os
+import time
+import socket
+import sqlite3
+import threading
+
+from . import config
+from .palettes import palette_dict
+from .output import output_exts, save_map
+from .svg import write_svg
+from .render import draw_map
+from .server import WorldCache
+
+
+#%%%RENDER FARM
+#Every machine runs "armap --farm" against the same Map Data share, the queue is a SQLite file beside the worlds
+farm_schema = """
+CREATE TABLE IF NOT EXISTS jobs (world TEXT, palette TEXT, state TEXT, worker TEXT, heartbeat REAL, tries INTEGER,
+                                 PRIMARY KEY (world, palette));
+"""
+
+def open_queue():
+    #No WAL, it needs shared memory the machines on a network share do not have
+    conn = sqlite3.connect(config.farm_queue, timeout=60, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.executescript(farm_schema)
+    return conn
+
+def enqueue(conn, folders):
+    #Jobs already in the queue are left as they are, so every machine can enqueue the same folders
+    conn.execute("BEGIN IMMEDIATE")
+    conn.executemany("INSERT OR IGNORE INTO jobs VALUES (?,?,'todo',NULL,0,0)",
+                     [(folder, palette) for folder in folders for palette in palette_dict])
+    conn.execute("COMMIT")
+
+def claim(conn, worker, prefer):
+    #Takes back the jobs of workers that stopped beating, then picks one, from the world this worker has loaded if it can
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        stale = conn.execute("UPDATE jobs SET state='todo', worker=NULL WHERE state='claimed' AND heartbeat < ?",
+                             (time.time() - config.farm_stale,)).rowcount
+        if(stale > 0):
+            print(f"Released {stale} stale jobs")
+        row = conn.execute("SELECT world, palette FROM jobs WHERE state='todo' ORDER BY world != ?, world, rowid LIMIT 1", (prefer,)).fetchone()
+        if row is not None:
+            conn.execute("UPDATE jobs SET state='claimed', worker=?, heartbeat=? WHERE world=? AND palette=?", (worker, time.time()) + row)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return row
+
+def finish(conn, worker, job, error=None):
+    #A job whose claim was taken over in the meantime is left to its new worker
+    if error is None:
+        conn.execute("UPDATE jobs SET state='done' WHERE world=? AND palette=? AND worker=?", job + (worker,))
+    else:
+        conn.execute("UPDATE jobs SET state=CASE WHEN tries+1 >= ? THEN 'failed' ELSE 'todo' END, worker=NULL, tries=tries+1 "
+                     "WHERE world=? AND palette=? AND worker=?", (config.farm_retries,) + job + (worker,))
+
+def pending(conn):
+    return conn.execute("SELECT COUNT(*) FROM jobs WHERE state IN ('todo','claimed')").fetchone()[0]
+
+class Heartbeat:
+    #Touches the claimed job every farm_heartbeat seconds on its own connection while the map draws
+    def __init__(self, worker, job):
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self.run, args=(worker, job), daemon=True)
+        self.thread.start()
+
+    def run(self, worker, job):
+        conn = open_queue()
+        try:
+            while not self.stop.wait(config.farm_heartbeat):
+                conn.execute("UPDATE jobs SET heartbeat=? WHERE world=? AND palette=? AND worker=?", (time.time(),) + job + (worker,))
+        finally:
+            conn.close()
+
+    def close(self):
+        self.stop.set()
+        self.thread.join()
+
+def render_job(worlds, world, palette):
+    w = worlds.get(world)
+    saved = {n:getattr(config, n) for n in ["title_align","mandatory_cities"]}
+    try:
+        config.mandatory_cities = saved["mandatory_cities"] + w.world["mandatory"]
+        (im, state, svg_layers) = draw_map(palette, w.fn, w.world, w.names, w.stages)
+    finally:
+        for n in saved:
+            setattr(config, n, saved[n])
+    #Written here rather than on the output threads, a job is only done once its map is on disk
+    #save_map renames a finished temporary file into place, so no machine ever sees half of one
+    #A fresh share may not have Maps yet, every job would fail on it
+    os.makedirs(config.output_path, exist_ok=True)
+    path = f"{config.output_path}{w.names[0]} - {palette}" + output_exts[config.output_format]
+    save_map(im, path)
+    if config.svg_export:
+        write_svg(f"{config.output_path}{w.names[0]} - {palette}.svg", state["canv"].shape[:2], palette_dict[palette], svg_layers)
+    return path
+
+def farm(folders):
+    config.show_maps = False
+    worker = f"{socket.gethostname()}-{os.getpid()}"
+    conn = open_queue()
+    enqueue(conn, folders)
+    print(f"Worker {worker} joined the queue at {config.farm_queue}")
+    worlds = WorldCache()
+    current = None
+    try:
+        while True:
+            job = claim(conn, worker, current)
+            if job is None:
+                #Others may still die holding jobs, so wait until nothing is left before leaving
+                if(pending(conn) == 0):
+                    break
+                time.sleep(config.farm_heartbeat)
+                continue
+            (current, palette) = job
+            print(f"Beginning {palette} map of {current}")
+            beat = Heartbeat(worker, job)
+            try:
+                render_job(worlds, current, palette)
+            except Exception as e:
+                print(f"ERROR: {palette} map of {current} failed: {e!r}")
+                finish(conn, worker, job, e)
+                continue
+            finally:
+                beat.close()
+            finish(conn, worker, job)
+            print(f"{palette} map of {current} done.")
+        for (world, palette) in conn.execute("SELECT world, palette FROM jobs WHERE state='failed'"):
+            print(f"ERROR: {palette} map of {world} failed {config.farm_retries} times")
+    finally:
+        conn.close()
+    print(f"Worker {worker} found no more jobs")
@@ -0,0 +1,29 @@
+#%%FUNCTIONS
+#Kept free of module level imports so the palettes and helpers can be reused without loading cv2
+
+def test_image(img):
+    import cv2 as cv
+    from PIL import Image
+    img = Image.fromarray(img[:,:,::-1])
+    img = img.convert("RGBA")
+    img.show()
+    cv.waitKey(0)
+    
+def tmp_name(path):
+    #A temporary name beside path that no other thread, process or farm machine writing path at the same time uses
+    import os, socket, threading
+    return f"{path}.{socket.gethostname()}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+def px(n):
+    #Pixel sizes are tuned for full size maps, a map drawn draw_scale times smaller shrinks them to match
+    from . import config
+    return max(1, round(n/config.draw_scale))
+
+def blue_conversion(img):
+    idx = img[:, :, 2] == 0
+    grey_value = img[idx, 0] * .73
+    img[idx, 0] = grey_value
+    img[idx, 1] = grey_value
+    img[idx, 2] = grey_value
+
+    return img
@@ -0,0 +1,78 @@
+import time
+
+from . import config
+
+
+#%%%LABEL PLACEMENT
+def label_candidates(x, y, size, subsize, shape):
+    #Places a label may go around its point, best first: right, left, above, below
+    #Each is (anchor, pos, subpos, box), box is the inclusive (x0,y0,x1,y1) of the name and the translation under it
+    (w, h) = size
+    h2 = subsize[1]
+    (ox, oy) = config.text_offset
+    above = y-oy-h/2-h2
+    below = y+oy+h/2
+    cands = [("lm", (x+ox,y), (x+ox+w/2,y+h/2), (x+ox, int(y-h/2), x+ox+w, int(y+h/2+h2))),
+             ("rm", (x-ox,y), (x-ox-w/2,y+h/2), (x-ox-w, int(y-h/2), x-ox, int(y+h/2+h2))),
+             ("mm", (x,above), (x,above+h/2), (int(x-w/2), int(above-h/2), int(x+w/2), int(above+h/2+h2))),
+             ("mm", (x,below), (x,below+h/2), (int(x-w/2), int(below-h/2), int(x+w/2), int(below+h/2+h2)))]
+    return [c for c in cands if c[3][0] >= 0 and c[3][1] >= 0 and c[3][2] < shape[1] and c[3][3] < shape[0]]
+
+def boxes_clash(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+def clash_graph(labels):
+    #Candidates of different labels that overlap, found with a sweep along x
+    nodes = sorted(((i,k) for i in range(len(labels)) for k in range(len(labels[i]))), key=lambda n: labels[n[0]][n[1]][3][0])
+    clash = {n:set() for n in nodes}
+    for a,(i,k) in enumerate(nodes):
+        box = labels[i][k][3]
+        for (j,l) in nodes[a+1:]:
+            other = labels[j][l][3]
+            if(other[0] > box[2]):
+                break
+            if(i != j and boxes_clash(box, other)):
+                clash[(i,k)].add((j,l))
+                clash[(j,l)].add((i,k))
+    return clash
+
+def place_labels(labels, budget):
+    #labels holds the candidates of each label, most important first
+    #Returns the candidate picked for every label, None where it could not fit
+    clash = clash_graph(labels)
+    chosen = [None]*len(labels)
+    placed = set()
+    #Greedy pass, every label takes its best free candidate in order of importance
+    for i in range(len(labels)):
+        for k in range(len(labels[i])):
+            if not (clash[(i,k)] & placed):
+                chosen[i] = k
+                placed.add((i,k))
+                break
+    #Repair pass, a dropped label may push the one label in its way to another of that label's candidates
+    deadline = time.perf_counter() + budget
+    improved = True
+    while(improved and time.perf_counter() < deadline):
+        improved = False
+        for i in range(len(labels)):
+            if(chosen[i] is not None):
+                continue
+            if(time.perf_counter() >= deadline):
+                break
+            for k in range(len(labels[i])):
+                blockers = clash[(i,k)] & placed
+                if(len(blockers) != 1):
+                    continue
+                (j,l) = blockers.pop()
+                for m in range(len(labels[j])):
+                    if(m != l and (i,k) not in clash[(j,m)] and not (clash[(j,m)] & placed)):
+                        placed.discard((j,l))
+                        placed.add((j,m))
+                        placed.add((i,k))
+                        chosen[j] = m
+                        chosen[i] = k
+                        improved = True
+                        break
+                if(chosen[i] is not None):
+                    break
+    return chosen
@@ -0,0 +1,84 @@
+import os
+import cv2 as cv
+import numpy as np
+
+from . import config
+from .rawmaps import raw_layer
+from .functions import tmp_name
+
+
+#%%%LAYERS
+layer_modes = {"el":cv.IMREAD_COLOR,"veg":cv.IMREAD_GRAYSCALE,"bm":cv.IMREAD_COLOR,"hyd":cv.IMREAD_COLOR,"str":cv.IMREAD_COLOR}
+layer_cache = {}
+
+def decode_layer(fn, key):
+    #Decodes a map BMP or raw export once into a .npy beside it and returns the .npy path
+    path = fn[key]
+    npy = os.path.splitext(path)[0] + ".npy"
+    if(not os.path.exists(npy) or os.path.getmtime(npy) < os.path.getmtime(path)):
+        if path.endswith(".raw"):
+            img = raw_layer(path,key)
+        else:
+            img = cv.imread(path,layer_modes[key])
+            if img is None:
+                raise ValueError(f"Could not read {path}")
+        tmp = tmp_name(npy)
+        with open(tmp,"wb") as f:
+            np.save(f,img)
+        os.replace(tmp,npy)
+    return npy
+
+def load_layer(fn, key):
+    #Every later use memory-maps the decoded layer read-only
+    npy = decode_layer(fn, key)
+    if npy not in layer_cache:
+        layer_cache[npy] = np.load(npy,mmap_mode="r")
+    return layer_cache[npy]
+
+def derived_layers(fn, folder, tag, func):
+    #Writes func(layer) of every layer to folder as <key>-<tag>.npy, the stages read those in place of the full maps
+    os.makedirs(folder, exist_ok=True)
+    out = {}
+    for key in layer_modes:
+        if key not in fn:
+            continue
+        npy = f"{folder}{key}-{tag}.npy"
+        if(not os.path.exists(npy) or os.path.getmtime(npy) < os.path.getmtime(fn[key])):
+            #Only the newest of each layer is kept
+            for f in os.listdir(folder):
+                if(f.startswith(key+"-") and f.endswith(".npy")):
+                    try:
+                        os.remove(folder + f)
+                    except FileNotFoundError:
+                        pass #another worker removed it first
+            img = np.ascontiguousarray(func(key, load_layer(fn, key)))
+            tmp = tmp_name(npy)
+            with open(tmp,"wb") as f:
+                np.save(f,img)
+            os.replace(tmp,npy)
+        out[key] = npy
+    return out
+
+#%%%ISOLINES
+isoline_cache = {}
+
+def world_isolines(fn, shape):
+    #Contours only depend on elevation, so each level is traced once per elevation layer and shared by all palettes
+    #The levels are kept per (elevation .npy, when it was decoded, drawn size, tolerance), for the last isoline_worlds of them
+    npy = decode_layer(fn, "el")
+    key = (npy, os.path.getmtime(npy), tuple(shape), config.isoline_epsilon)
+    if key not in isoline_cache:
+        while len(isoline_cache) >= max(1, config.isoline_worlds):
+            del isoline_cache[next(iter(isoline_cache))]
+        isoline_cache[key] = {}
+    return isoline_cache[key]
+
+def isolines(fn, thresh, level):
+    #thresh is a BitMask and is only unpacked when the level is not cached yet
+    cache = world_isolines(fn, thresh.shape)
+    if level not in cache:
+        contours, hierarchy = cv.findContours(thresh.unpack(), cv.RETR_TREE, cv.CHAIN_APPROX_SIMPLE)
+        if(config.isoline_epsilon > 0):
+            contours = tuple(cv.approxPolyDP(c, config.isoline_epsilon, True) for c in contours)
+        cache[level] = contours
+    return cache[level]
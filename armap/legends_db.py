@@ -0,0 +1,189 @@
+import os
+import gzip
+import sqlite3
+import xml.etree.ElementTree as ET
+
+from .functions import tmp_name
+
+
+#%%%LEGENDS DATABASE
+legends_schema = """
+CREATE TABLE regions (id INTEGER PRIMARY KEY, name TEXT, type TEXT);
+CREATE TABLE sites (id INTEGER PRIMARY KEY, type TEXT, name TEXT, coords TEXT, rect TEXT);
+CREATE TABLE entities (id INTEGER PRIMARY KEY, name TEXT);
+CREATE TABLE events (id INTEGER PRIMARY KEY, year INTEGER, type TEXT, site_id INTEGER,
+                     civ_id INTEGER, site_civ_id INTEGER, attacker_civ_id INTEGER,
+                     defender_civ_id INTEGER, new_site_civ_id INTEGER);
+CREATE TABLE collections (id INTEGER PRIMARY KEY, type TEXT, name TEXT, start_year INTEGER,
+                          end_year INTEGER, aggressor_ent_id INTEGER, defender_ent_id INTEGER);
+"""
+legends_indexes = """
+CREATE INDEX events_site ON events (site_id, year);
+CREATE INDEX events_type ON events (type, year);
+CREATE INDEX events_civ ON events (civ_id);
+CREATE INDEX events_attacker ON events (attacker_civ_id);
+CREATE INDEX events_defender ON events (defender_civ_id);
+CREATE INDEX collections_type ON collections (type, end_year);
+CREATE INDEX collections_aggressor ON collections (aggressor_ent_id);
+CREATE INDEX collections_defender ON collections (defender_ent_id);
+"""
+event_columns = ["id","year","type","site_id","civ_id","site_civ_id","attacker_civ_id","defender_civ_id","new_site_civ_id"]
+collection_columns = ["id","type","name","start_year","end_year","aggressor_ent_id","defender_ent_id"]
+
+def db_int(v):
+    if(v is None):
+        return None
+    return int(v)
+
+def open_legends(flegends):
+    #.xml.gz exports are decompressed as they are parsed
+    if flegends.endswith(".gz"):
+        return gzip.open(flegends,"rb")
+    return open(flegends,"rb")
+
+def build_legends_db(db_path, flegends):
+    #Streams the legends xml into sqlite, only the records armap reads are kept
+    #Built beside db_path and renamed into place, an interrupted build never leaves a database that looks current
+    tmp = tmp_name(db_path)
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    conn = sqlite3.connect(tmp)
+    conn.executescript(legends_schema)
+    depth = 0
+    section = None
+    f = open_legends(flegends)
+    for event, elem in ET.iterparse(f, events=("start","end")):
+        if(event == "start"):
+            depth += 1
+            if(depth == 2):
+                section = elem.tag
+            continue
+        if(depth == 3):
+            if(section == "regions"):
+                conn.execute("INSERT INTO regions VALUES (?,?,?)",(int(elem[0].text),elem[1].text,elem[2].text))
+            elif(section == "sites" and len(elem) > 1):
+                conn.execute("INSERT INTO sites VALUES (?,?,?,?,?)",(int(elem[0].text),elem[1].text,elem[2].text,elem[3].text,elem[4].text))
+            elif(section == "entities" and len(elem) > 1):
+                conn.execute("INSERT INTO entities VALUES (?,?)",(int(elem[0].text),elem[1].text))
+            elif(section == "historical_events"):
+                e = {c.tag:c.text for c in elem}
+                conn.execute("INSERT INTO events VALUES (?,?,?,?,?,?,?,?,?)",
+                             [e.get(c) if c == "type" else db_int(e.get(c)) for c in event_columns])
+            elif(section == "historical_event_collections"):
+                e = {c.tag:c.text for c in elem}
+                conn.execute("INSERT INTO collections VALUES (?,?,?,?,?,?,?)",
+                             [e.get(c) if c in ["type","name"] else db_int(e.get(c)) for c in collection_columns])
+            elem.clear()
+        elif(depth == 2):
+            elem.clear()
+        depth -= 1
+    f.close()
+    conn.executescript(legends_indexes)
+    conn.commit()
+    conn.close()
+    os.replace(tmp, db_path)
+    return sqlite3.connect(db_path)
+
+def open_legends_db(file_path, flegends):
+    db_path = file_path + "legends.sqlite"
+    if(os.path.exists(db_path) and os.path.getmtime(db_path) >= os.path.getmtime(flegends)):
+        return sqlite3.connect(db_path)
+    print("Building legends database...")
+    return build_legends_db(db_path, flegends)
+
+def db_load_basics(conn):
+    d_regions = {}
+    d_sites = {}
+    d_entities = {}
+    for (i,name,typ) in conn.execute("SELECT id, name, type FROM regions ORDER BY id"):
+        d_regions[str(i)] = {"name":name,"type":typ}
+    for (i,typ,name,coords,rect) in conn.execute("SELECT id, type, name, coords, rect FROM sites ORDER BY id"):
+        (a,b) = rect.split(":")
+        d_sites[str(i)] = {"type":typ,"name":name,"pos":coords.split(","),"rect":[a.split(","),b.split(",")]}
+    for (i,name) in conn.execute("SELECT id, name FROM entities ORDER BY id"):
+        d_entities[str(i)] = name
+    return d_regions, d_sites, d_entities
+
+def db_site_owners(conn, d_sites, event_types, year=None):
+    #Same rules as the in-memory owner pass, as one ordered scan over the type index
+    government_owner = {}
+    civs = []
+    q = "SELECT site_id, type, civ_id, site_civ_id, attacker_civ_id, new_site_civ_id FROM events WHERE type IN (%s)" % ",".join("?"*len(event_types))
+    params = list(event_types)
+    if(year is not None):
+        q += " AND year <= ?"
+        params.append(year)
+    q += " ORDER BY site_id, id"
+    for (s,typ,civ,site_civ,attacker,new_site_civ) in conn.execute(q, params):
+        s = str(s)
+        if(s not in d_sites):
+            continue
+        if(typ in ["created site","reclaim site"]):
+            d_sites[s]["ruler"] = str(civ)
+            if(site_civ is not None and site_civ != -1 and civ != -1):
+                government_owner[site_civ] = civ
+                if(str(civ) not in civs):
+                    civs.append(str(civ))
+        elif(typ in ["destroyed site","hf destroyed site"]):
+            d_sites[s]["ruler"] = -1
+        elif(typ in ["site taken over","new site leader"]):
+            d_sites[s]["ruler"] = str(attacker)
+            government_owner[new_site_civ] = attacker
+            if(str(attacker) not in civs and attacker != -1):
+                civs.append(str(attacker))
+    return government_owner, civs
+
+def db_site_owner(conn, site_id, year, event_types):
+    #Who owned site_id at the end of year, -1 if destroyed, None if never owned
+    row = conn.execute("SELECT type, civ_id, attacker_civ_id FROM events WHERE site_id = ? AND year <= ? AND type IN (%s) ORDER BY id DESC LIMIT 1" % ",".join("?"*len(event_types)),
+                       [int(site_id), year] + list(event_types)).fetchone()
+    if(row is None):
+        return None
+    (typ,civ,attacker) = row
+    if(typ in ["created site","reclaim site"]):
+        return civ
+    elif(typ in ["destroyed site","hf destroyed site"]):
+        return -1
+    return attacker
+
+def db_active_wars(conn, government_owner, civ=None, year=None):
+    #Wars still running (or running in year), keyed like active_wars: min civ -> set of max civs
+    q = "SELECT aggressor_ent_id, defender_ent_id FROM collections WHERE type = 'war'"
+    params = []
+    if(year is None):
+        q += " AND end_year = -1"
+    else:
+        q += " AND start_year <= ? AND (end_year = -1 OR end_year >= ?)"
+        params += [year, year]
+    if(civ is not None):
+        govs = [g for g in government_owner if government_owner[g] == civ] + [civ]
+        marks = ",".join("?"*len(govs))
+        q += " AND (aggressor_ent_id IN (%s) OR defender_ent_id IN (%s))" % (marks, marks)
+        params += govs + govs
+    active_wars = {}
+    for (a,b) in conn.execute(q, params):
+        if(b in government_owner):
+            b = government_owner[b]
+        if(a in government_owner):
+            a = government_owner[a]
+        if(a == b):
+            continue
+        if(min(a,b) in active_wars):
+            active_wars[min(a,b)].add(max(a,b))
+        else:
+            active_wars[min(a,b)] = {max(a,b)}
+    return active_wars
+
+def db_ownership_events(conn, event_types):
+    #Every change of a site's ruler as (year, site_id, ruler) in the order it happened, -1 for destroyed
+    q = "SELECT year, site_id, type, civ_id, attacker_civ_id FROM events WHERE type IN (%s) ORDER BY year, id" % ",".join("?"*len(event_types))
+    events = []
+    for (year,s,typ,civ,attacker) in conn.execute(q, list(event_types)):
+        if(typ in ["created site","reclaim site"]):
+            ruler = civ
+        elif(typ in ["destroyed site","hf destroyed site"]):
+            ruler = -1
+        else:
+            ruler = attacker
+        events.append((year, str(s), -1 if ruler is None else ruler))
+    return events
@@ -0,0 +1,54 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import config
+from .functions import tmp_name
+
+
+#%%%OUTPUT
+output_exts = {"png":".png","png-fast":".png","png-quantized":".png","webp":".webp"}
+
+def save_map(im, path):
+    #Encodes to a temp name beside path and renames it into place, so a half written map is never picked up
+    tmp = tmp_name(path)
+    try:
+        if(config.output_format == "png"):
+            im.save(tmp, "PNG")
+        elif(config.output_format == "png-fast"):
+            im.save(tmp, "PNG", compress_level=1)
+        elif(config.output_format == "png-quantized"):
+            im.quantize(256, method=2).save(tmp, "PNG", optimize=True) #method 2 is fast octree, the only one that takes RGBA
+        elif(config.output_format == "webp"):
+            im.save(tmp, "WEBP", lossless=True)
+        else:
+            raise ValueError(f"Unknown output_format {config.output_format!r}")
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+class MapWriter:
+    #Background encoder pool, save() blocks once output_queue maps are waiting so finished maps can't pile up in memory
+    def __init__(self):
+        self.pool = ThreadPoolExecutor(max_workers=config.output_workers)
+        self.slots = threading.BoundedSemaphore(config.output_queue)
+        self.pending = []
+
+    def save(self, im, path):
+        #path has no extension, the one matching output_format is added and returned
+        path += output_exts[config.output_format]
+        self.slots.acquire()
+        job = self.pool.submit(save_map, im, path)
+        job.add_done_callback(lambda job: self.slots.release())
+        self.pending.append(job)
+        return path
+
+    def close(self):
+        #Waits for every queued map and raises the first encoding error
+        try:
+            for job in self.pending:
+                job.result()
+        finally:
+            self.pool.shutdown()
+            self.pending = []
@@ -0,0 +1,237 @@
+#%%COLORS
+shadowfox = {
+  0: (  0, 30, 80),#   0.000%,
+  14: (  0, 51,102),#  11.110%,
+  35: (  0,102,153),#  22.220%,
+  79: (  0,153,205),#  33.330%,
+  63: (100,200,255),#  38.890%,
+  72: (198,236,255),#  42.220%,
+  
+  73: (148,171,132),#  44.440%,
+  76: (172,191,139),#  45.560%,
+  80: (189,204,150),#  46.670%,
+  91: (228,223,175),#  50.000%,
+  109: (230,202,148),#  55.560%,
+  145: (205,171,131),#  66.670%,
+  182: (181,152,128),#  77.780%,
+  218: (155,123, 98)#  88.890%,
+                        }
+meyers = {
+  0: ( 91,140,164),#   0.000%,
+  21: (120,164,183),#  20.000%,
+  42: (128,173,193),#  40.000%,
+  54: (146,182,195),#  50.000%,
+  72: (200,219,225),#  58.000%,
+  
+  73: (178,202,153),#  60.000%,
+  82: (215,224,199),#  62.000%,
+  95: (208,195,180),#  65.000%,
+  118: (155,115, 93),#  70.000%,
+  164: (100, 53, 32),#  80.000%,
+  209: ( 43, 10, 11),#  90.000%
+}
+
+nordisk = {
+  0: (108,139,141),#   0.000%,
+  14: (129,159,144),#  16.670%,
+  35: (169,182,162),#  33.330%,
+  49: (192,198,173),#  50.000%,
+  72: (230,221,204),#  65.000%,
+  
+  73: (188,187,128),#  66.670%,
+  82: (207,199,153),#  68.330%,
+  95: (227,194,165),#  70.830%,
+  118: (215,158,120),#  75.000%,
+  163: (213,130, 85),#  83.330%
+  209: ( 93, 42, 19)#  91.670%
+}
+
+schwarzwald = {
+  0:(100,200,255),
+  72:(100,200,255),
+  73: (176,243,190),#   0.000,
+  85: (224,251,178),#   6.670%,
+  97: (184,222,118),#  13.330%,
+  109: ( 39,165, 42),#  20.000%,
+  121: ( 52,136, 60),#  26.670%,
+  133: (156,164, 41),#  33.330%,
+  145: (248,176,  4),#  40.000%,
+  157: (192, 74,  2),#  46.670%,
+  170: (135,  8,  0),#  53.330%,
+  182: (116, 24,  5),#  60.000%,
+  194: (108, 42, 10),#  66.670%,
+  206: (125, 74, 43),#  73.330%,
+  218: (156,129,112),#  80.000%,
+  230: (181,181,181),#  86.670%,
+  242: (218,216,218)#  93.330%
+}
+
+carte = {
+        0: (113,171,216),
+        7: (121,178,222),
+        14: (132,185,227),
+        21: (141,193,234),
+        28: (150,201,240),
+        35: (161,210,247),
+        42: (172,219,251),
+        49: (185,227,255),
+        54: (198,236,255),
+        72: (216,252,254),
+        
+        73: (172,208,165),
+        83: (148,191,139),
+        93: (168,198,143),
+        103: (189,204,150),
+        113: (209,215,171),
+        123: (255,228,181),
+        133: (239,235,192),
+        143: (232,225,182),
+        153: (222,214,163),
+        163: (211,202,157),
+        173: (202,185,130),
+        183: (195,167,107),
+        193: (185,152,90),
+        203: (170,135,83),
+        213: (172,154,124),
+        223: (186,174,154),
+        233: (202,195,184),
+        243: (224,222,216),
+        253: (245,244,242)
+}
+
+coronet = {
+    #0: (95,139,125),
+    0: (43, 84, 108),
+    7: (53, 97, 112),
+    14: (58, 103, 114),
+    21: (61, 106, 116),
+    28: (63, 109, 116),
+    35: (66, 112, 117),
+    42: (68, 115, 118),
+    49: (73, 121, 120),
+    54: (78, 127, 122),
+    72: (83, 133, 123),
+    73: (155,144,121),
+    83: (165,158,136),
+    93: (172,165,145),
+    103: (171,164,145),
+    113: (171,164,145),
+    123: (160,155,135),
+    133: (165,163,144),
+    143: (168,163,144),
+    153: (159,154,135),
+    163: (159,155,135),
+    173: (154,148,127),
+    183: (157,152,128),
+    193: (236,235,220),
+    203: (231,229,217),
+    213: (236,236,223)
+}
+
+extra = {
+            0: (20, 48, 102),
+            1: (20, 49, 102),
+            2: (20, 50, 103),
+            3: (20, 51, 103),
+            4: (20, 52, 103),
+            5: (20, 54, 104),
+            6: (20, 55, 104),
+            7: (20, 56, 105),
+            8: (21, 57, 105),
+            9: (21, 58, 105),
+            10: (21, 59, 106),
+            11: (21, 60, 106),
+            12: (21, 61, 106),
+            13: (21, 62, 107),
+            14: (21, 64, 107),
+            15: (21, 65, 107),
+            16: (21, 66, 108),
+            17: (21, 67, 108),
+            18: (21, 68, 109),
+            19: (21, 69, 109),
+            20: (21, 70, 109),
+            21: (21, 71, 110),
+            22: (22, 72, 110),
+            23: (22, 74, 110),
+            24: (22, 75, 111),
+            25: (22, 76, 111),
+            26: (22, 77, 111),
+            27: (22, 78, 112),
+            28: (22, 79, 112),
+            29: (22, 80, 112),
+            30: (22, 81, 113),
+            31: (22, 82, 113),
+            32: (22, 84, 114),
+            33: (22, 85, 114),
+            34: (22, 86, 114),
+            35: (22, 87, 115),
+            36: (23, 88, 115),
+            37: (23, 89, 115),
+            38: (23, 90, 116),
+            39: (23, 91, 116),
+            40: (23, 92, 116),
+            41: (23, 94, 117),
+            42: (23, 95, 117),
+            43: (23, 96, 118),
+            44: (23, 97, 118),
+            45: (23, 98, 118),
+            46: (23, 99, 119),
+            47: (23, 100, 119),
+            48: (23, 101, 119),
+            49: (23, 102, 120),
+            50: (23, 104, 120),
+            51: (24, 105, 120),
+            52: (24, 106, 121),
+            53: (24, 107, 121),
+            54: (24, 108, 122),
+            55: (24, 109, 122),
+            56: (24, 110, 122),
+            57: (24, 111, 123),
+            58: (24, 112, 123),
+            59: (24, 114, 123),
+            60: (24, 115, 124),
+            61: (24, 116, 124),
+            62: (24, 117, 124),
+            63: (24, 118, 125),
+            64: (24, 119, 125),
+            65: (25, 120, 125),
+            66: (25, 121, 126),
+            67: (25, 122, 126),
+            68: (25, 124, 127),
+            69: (25, 125, 127),
+            70: (25, 126, 127),
+            71: (25, 127, 128),
+            72: (25, 128, 128),
+            73: (55, 37, 27),
+            83: (61, 41, 30),
+            93: (67, 45, 33),
+            103: (74, 49, 36),
+            113: (81, 54, 40),
+            123: (89, 59, 44),
+            133: (105, 80, 60),
+            143: (113, 91, 68),
+            153: (121, 101, 76),
+            163: (129, 112, 84),
+            173: (137, 122, 92),
+            183: (153, 142, 107),
+            193: (236,235,220),
+            203: (231,229,217),
+            213: (236,236,223)
+        }       
+
+
+ent_colors = [(255, 179, 0),(128, 62, 117),(255, 104, 0),(166, 189, 215),(193, 0, 32),(206, 162, 98),(129, 112, 102),(0, 125, 52),(246, 118, 142),(0, 83, 138),(255, 122, 92),(83, 55, 122),(255, 142, 0),(179, 40, 81),(244, 200, 0),(127, 24, 13),(147, 170, 0),(89, 51, 21),(241, 58, 19),(35, 44, 22)]#kelly_colors
+
+
+palette_dict =  {
+                    "shadowfox" : shadowfox,
+                    "meyers" : meyers,
+                    "nordisk" : nordisk,
+                    "schwarzwald" : schwarzwald,
+                    "carte" : carte,
+                    "coronet" : coronet,
+                    "extra" : extra
+                }
+
+# palette_choice = "coronet"
+#color = palette_dict[palette_choice]
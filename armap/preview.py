@@ -0,0 +1,90 @@
+import math
+import cv2 as cv
+import numpy as np
+from PIL import Image, ImageDraw
+
+from . import config
+from .palettes import palette_dict
+from .layers import layer_cache, derived_layers
+from .text import load_font
+from .stages import StageCache
+from .output import MapWriter
+from .render import find_files, world_names, read_world, draw_map
+
+
+#%%%PREVIEW
+preview_sizes = ["title_size","subtitle_size","font_size","sub_size","big_point","med_point","small_point"] #shrunk with the map
+preview_offsets = ["text_offset","titleadjust"]
+
+def shrink_layer(key, img, factor):
+    (h, w) = img.shape[:2]
+    #The class colors have to survive, only the vegetation density is averaged
+    mode = cv.INTER_AREA if key == "veg" else cv.INTER_NEAREST
+    return cv.resize(np.asarray(img), (max(1,w//factor), max(1,h//factor)), interpolation=mode)
+
+def shrink_world(world, factor):
+    #Same sites with their rects in preview pixels, occ_sites keeps pointing at the d_sites entries
+    d_sites = {}
+    for s,site in world["d_sites"].items():
+        ((x1,y1),(x2,y2)) = site["rect"]
+        d_sites[s] = dict(site, rect=[[int(x1)//factor,int(y1)//factor],[int(x2)//factor,int(y2)//factor]])
+    occ_sites = {s:d_sites[s] for s in world["occ_sites"]}
+    return dict(world, d_sites=d_sites, occ_sites=occ_sites)
+
+def contact_sheet(maps):
+    #Every palette in a grid, captioned with its name
+    (w, h) = maps[0][1].size
+    size = max(8, min(config.font_size, w//len(max(palette_dict, key=len))))
+    font = load_font(size)
+    cap = size + 8
+    cols = math.ceil(math.sqrt(len(maps)))
+    rows = math.ceil(len(maps)/cols)
+    sheet = Image.new("RGBA", (cols*w, rows*(h+cap)), (0,0,0,255))
+    draw = ImageDraw.Draw(sheet)
+    for i,(palette, im) in enumerate(maps):
+        (x, y) = ((i%cols)*w, (i//cols)*(h+cap))
+        draw.text((x+w/2,y+cap/2), palette, font=font, anchor="mm", fill=config.label_color)
+        sheet.paste(im, (x,y+cap))
+    return sheet
+
+def preview(folder):
+    factor = config.preview_factor
+    print(f"Previewing {folder} at 1/{factor}")
+    layer_cache.clear()
+    (file_path, fn, flegends, pops, wh) = find_files(folder)
+    stages = StageCache(file_path + "stages/", dict(fn, legends=flegends, pops=pops))
+    stages.key("legends")
+    world = stages.memo("legends", read_world, file_path, flegends, pops)
+    names = world_names(wh)
+    #Each layer is cut down once per factor into preview/
+    small = derived_layers(fn, file_path + "preview/", factor, lambda key, img: shrink_layer(key, img, factor))
+    #The preview's stages are kept apart so they never push out the full size ones
+    small_stages = StageCache(file_path + "preview/stages/", dict(small, legends=flegends, pops=pops))
+    saved = {n:getattr(config, n) for n in preview_sizes + preview_offsets + ["draw_scale","glyph_atlas","title_align","mandatory_cities"]}
+    try:
+        config.draw_scale = factor
+        config.glyph_atlas = True #one shadow blur for all the labels
+        for n in preview_sizes:
+            setattr(config, n, max(1, round(saved[n]/factor)))
+        for n in preview_offsets:
+            setattr(config, n, tuple(round(v/factor) for v in saved[n]))
+        config.mandatory_cities = saved["mandatory_cities"] + world["mandatory"]
+        small_stages.key("legends")
+        small_world = shrink_world(world, factor)
+        maps = []
+        for palette in palette_dict:
+            print(f"Previewing {palette}")
+            (im, state, svg_layers) = draw_map(palette, small, small_world, names, small_stages)
+            maps.append((palette, im))
+    finally:
+        for n in saved:
+            setattr(config, n, saved[n])
+        layer_cache.clear()
+    sheet = contact_sheet(maps)
+    if config.show_maps:
+        sheet.show()
+    writer = MapWriter()
+    path = writer.save(sheet, f"{config.output_path}{names[0]} - preview")
+    writer.close()
+    print("Preview saved to "+path)
+    print("---------------------------")
@@ -0,0 +1,59 @@
+import struct
+import numpy as np
+
+
+#%%%RAW MAPS
+#"exportlegends armaps-raw" writes the world tiles' classes instead of the rendered BMPs
+#Each .raw file is a header then width*height values, row by row, little endian
+raw_header = struct.Struct("<4sBBBHH") #magic, version, dtype, pixels per tile, width, height
+raw_magic = b"ARMR"
+raw_dtypes = {1:np.uint8, 2:np.int16}
+
+#Colors of the BMP classes the drawing code keys on, indexed by the class id exportlegends writes
+raw_biome_colors = {1:[255,255,0],2:[255,255,64],29:[255,255,128],      #glacier, tundra, arctic ocean
+                    24:[32,96,255],25:[64,128,255],26:[0,255,255]}      #badland, rock and sand desert
+raw_water_colors = [[0,0,0],[255,96,0],[255,112,0],[255,128,0],[255,160,0],[255,192,0],[255,224,0],[255,255,0]] #none, lake, ocean river, major river, river, minor river, stream, brook
+raw_struct_colors = [[0,0,0],[128,128,128],[255,255,255],[20,20,20],[224,224,224],[192,192,192],[96,96,96],  #none, castle, village, tunnel, stone bridge, stone road, stone wall
+                     [20,167,180],[20,127,150],[20,127,160],                                                 #other bridge, road, wall
+                     [0,128,255],[0,160,255],[0,192,255],[0,255,0],[0,255,64],[0,128,0],[0,160,0]]             #crops, pasture, meadow, woodland, orchard
+
+def read_raw(path):
+    with open(path,"rb") as f:
+        (magic, version, dtype, scale, w, h) = raw_header.unpack(f.read(raw_header.size))
+        if(magic != raw_magic or version != 1 or dtype not in raw_dtypes):
+            raise ValueError(f"{path} is not an armap raw map")
+        data = np.fromfile(f, dtype=np.dtype(raw_dtypes[dtype]).newbyteorder("<"), count=w*h)
+    if(data.size != w*h):
+        raise ValueError(f"{path} is truncated")
+    return (data.reshape(h,w), scale)
+
+def class_lut(colors):
+    lut = np.zeros((256,3), np.uint8)
+    for i,c in colors.items():
+        lut[i] = c
+    return lut
+
+def raw_layer(path, key):
+    #The same array cv.imread gives for the matching BMP, so the drawing code does not care where a layer came from
+    (data, scale) = read_raw(path)
+    if(key == "el"):
+        #Water keeps its depth in blue for blue_conversion, land is spread from just above sea level to white
+        e = data.astype(np.int32)
+        img = np.zeros(data.shape + (3,), np.uint8)
+        water = e < 100
+        img[water,0] = np.clip(e[water],0,99)
+        land = np.clip(74 + (e[~water]-100)*181//300,74,255)
+        img[~water] = land[:,None]
+    elif(key == "veg"):
+        img = np.uint8(np.clip(data.astype(np.int32),0,100)*255//100)
+    elif(key == "bm"):
+        img = class_lut(raw_biome_colors)[data]
+    elif(key == "hyd"):
+        img = class_lut(dict(enumerate(raw_water_colors)))[data]
+    elif(key == "str"):
+        img = class_lut(dict(enumerate(raw_struct_colors)))[data]
+    else:
+        raise ValueError(f"Unknown raw layer {key!r}")
+    if(scale > 1):
+        img = img.repeat(scale,axis=0).repeat(scale,axis=1)
+    return np.ascontiguousarray(img)
@@ -0,0 +1,1211 @@
+import os
+import re
+import math
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+import xml.etree.ElementTree as ET
+import cv2 as cv
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+from . import config
+from .palettes import palette_dict, ent_colors
+from .functions import blue_conversion, px
+from .legends_db import open_legends, open_legends_db, db_load_basics, db_site_owners, db_active_wars
+from .layers import layer_modes, layer_cache, decode_layer, load_layer, world_isolines, isolines
+from .text import load_font, textbbox, blit_text, compose_labels
+from .labels import label_candidates, place_labels
+from .svg import write_svg
+from .stages import StageCache
+from .output import MapWriter
+from .bitmask import BitMask
+from .spatial import PointIndex, contour_points
+
+
+def find_files(folder):
+    file_path = config.root_path + folder + "/"
+    files = os.listdir(file_path)
+    fn = {}
+    flegends = None
+    print("Parsing files...")
+    for f in files:
+        if(".bmp" in f or ".raw" in f):
+                m = re.search("([^-]*)\.(bmp|raw)",f)
+                if(m and (m.group(1) not in fn or m.group(2) == "raw")): #raw exports win over BMPs of the same layer
+                        fn[m.group(1)] = file_path+f
+        if(".xml" in f and "legends_plus" not in f and (flegends is None or "legends_lite" in f)): #the lite legends win over the full xml
+                flegends = file_path+f
+        if("pops.txt" in f):
+                pops = file_path+f
+        if("world_history.txt" in f):
+                wh = file_path+f
+    return (file_path, fn, flegends, pops, wh)
+
+def load_legends(file_path, flegends):
+    legends_db = None
+    if config.legends_backend == "sqlite":
+        print("Loading legends database...")
+        legends_db = open_legends_db(file_path, flegends)
+        d_regions, d_sites, d_entities = db_load_basics(legends_db)
+        d_hevent = {}
+        d_hcoll = {}
+    else:
+        print("Parsing xml...")
+        with open_legends(flegends) as f:
+                tree = ET.parse(f)
+        root = tree.getroot()
+    
+        ro = {}
+        for i,child in enumerate(root):
+                if(child.tag in ["regions", "sites", "entities", "historical_events", "historical_event_collections"]):
+                        ro[child.tag] = root[i]
+    
+        #regions = root[0]
+        #sites = root[2]
+        #entities = root[7]
+        #hevent = root[8]
+        #hcoll = root[9]
+    
+        regions = ro["regions"]
+        sites = ro["sites"]
+        entities = ro["entities"]
+        hevent = ro["historical_events"]
+        hcoll = ro["historical_event_collections"]
+    
+        d_regions = {}
+        d_sites = {}
+        d_entities = {}
+        d_hevent = {}
+        d_hcoll = {}
+    
+    
+        for child in regions:
+                d_regions[child[0].text] = {"name":child[1].text,"type":child[2].text}
+        for child in sites:
+            if(len(child) > 1):
+                xy = child[3].text.split(",")
+                (a,b) = child[4].text.split(":")
+                a = a.split(",")
+                b = b.split(",")
+                d_sites[child[0].text] = {"type":child[1].text,"name":child[2].text,"pos":xy,"rect":[a,b]}
+        for child in entities:
+                if(len(child) > 1):
+                        d_entities[child[0].text] = child[1].text
+        for child in hevent:
+                d_hevent[child[0].text] = {}
+                for c in child:
+                        d_hevent[child[0].text][c.tag] = c.text
+        for child in hcoll:
+                d_hcoll[child[0].text] = {}
+                for c in child:
+                        d_hcoll[child[0].text][c.tag] = c.text
+    
+    return (legends_db, d_regions, d_sites, d_entities, d_hevent, d_hcoll)
+
+def world_names(wh):
+    print("Parsing name...")
+    f1 = open(wh,'r',encoding='cp850',errors='ignore')
+    lines = f1.readlines()
+    i = 0
+    for l in lines:
+        if(i == 0):
+                worldtransname = l.strip()
+        elif(i == 1):
+                worldname = l.strip()
+        else:
+                break
+        i+=1
+    f1.close()
+    
+    return (worldtransname, worldname)
+
+#%%%PALETTE TABLES
+palette_luts = {}
+
+def palette_lut(color):
+    #256 entry BGR table for a breakpoint palette, every value takes the color of the highest breakpoint below it
+    key = (tuple(sorted(color.items())), config.palette_gradient)
+    if key not in palette_luts:
+        levels = sorted(color)
+        lut = np.zeros((256,1,3), np.uint8)
+        if config.palette_gradient:
+            for c in range(3):
+                lut[:,0,c] = np.round(np.interp(np.arange(256), [i+1 for i in levels], [color[i][2-c] for i in levels]))
+        else:
+            lut[:,0] = color[0][::-1]
+            for i in levels:
+                lut[i+1:,0] = color[i][::-1]
+        palette_luts[key] = lut
+    return palette_luts[key]
+
+def veg_lut():
+    #uint8 tint for every vegetation value, 0 is left black the way the masked overlay was
+    v = np.arange(256)
+    if config.veg_type == "Green":
+        #(-0.5176*veg)+132, (-0.4118*veg)+180, (-0.6980*veg)+178
+        lut = cv.merge([np.uint8((-0.4549*v)+116),np.uint8((-0.3804*v)+172),np.uint8((-0.6118*v)+156)])
+    else:
+        lut = cv.merge([np.uint8(v*(1-config.veg_green)),np.uint8(v*config.veg_green),np.uint8(v*(1-config.veg_green))])
+    lut[0] = 0
+    return lut.reshape(256,1,3)
+
+#%%%STAGE THREADS
+stage_threads = None
+stage_threads_lock = threading.Lock() #server and farm threads may submit the first stage at the same time
+
+def stage_submit(func, *args):
+    #Runs func on the stage_workers pool, or right away when there is only one worker
+    global stage_threads
+    if(config.stage_workers <= 1):
+        job = Future()
+        job.set_result(func(*args))
+        return job
+    with stage_threads_lock:
+        if stage_threads is None:
+            stage_threads = ThreadPoolExecutor(max_workers=config.stage_workers)
+    return stage_threads.submit(func, *args)
+
+def run_parallel(*calls):
+    #Independent (func, args...) calls, OpenCV and NumPy let go of the GIL so they share the cores, results come back in order
+    jobs = [stage_submit(*c) for c in calls]
+    return [job.result() for job in jobs]
+
+def elevation_bands(fn, color):
+    elevation = blue_conversion(load_layer(fn,"el").copy())
+    
+    grey = np.uint8(cv.cvtColor(elevation, cv.COLOR_BGR2GRAY))
+
+    #print("Elevation ranges from",np.amin(grey),"to",np.amax(grey))
+    #Opening the elevation once is the same as opening each of its thresholds, so the bands and isolines all come from it
+    kernel = np.ones((px(3), px(3)), 'uint8')
+    opened = cv.dilate(cv.erode(grey, kernel, iterations=1), kernel, iterations=1)
+    
+    t = {}
+    for i in set(color) | {73}:
+        t[i] = BitMask.pack(opened > i)
+    contours = {i:isolines(fn, t[i], i) for i in color if i != 0}
+    return (opened, t, contours)
+
+def vegetation_masks(fn):
+    veg = load_layer(fn,"veg")
+    ret,veg_mask = cv.threshold(veg,1,255,cv.THRESH_BINARY)
+    
+    veg_overlay = cv.LUT(cv.merge([veg,veg,veg]), veg_lut())
+    #veg_overlay = cv.blur(veg_overlay,(3,3))
+    return (veg, veg_mask, veg_overlay)
+
+def desert_masks(fn):
+    biome = load_layer(fn,"bm")
+    desert = np.zeros(biome.shape, dtype="uint8")
+    desert[np.where((biome==[32,96,255]).all(axis=2))] = [108,107,94]       #Badland desert
+    desert[np.where((biome==[0,255,255]).all(axis=2))] = [82,142,206]       #Sand desert
+    desert[np.where((biome==[64,128,255]).all(axis=2))] = [108,107,94]      #Rock desert
+    
+    dmask = np.uint8(cv.cvtColor(desert, cv.COLOR_BGR2GRAY))
+    dmask[np.where(dmask != 0)] = 255
+    return (desert, dmask)
+
+def glacier_masks(fn):
+    biome = load_layer(fn,"bm")
+    glacier = np.zeros(biome.shape, dtype="uint8")
+    glacier[np.where((biome==[255,255,0]).all(axis=2))] = [255,255,255]
+    glacier[np.where((biome==[255,255,64]).all(axis=2))] = [255,255,255]
+    glacier[np.where((biome==[255,255,128]).all(axis=2))] = [255,255,255]
+    #glacier = cv.dilate(glacier, kernel, iterations=1)
+    #[247,253,254]
+    
+    gmask = np.uint8(cv.cvtColor(glacier, cv.COLOR_BGR2GRAY))
+    return (glacier, gmask)
+
+def river_mask(fn):
+    water = load_layer(fn,"hyd")
+
+    rivers = np.zeros(water.shape[:2], dtype="uint8")
+    rivers[np.where((water==[255,96,0]).all(axis=2))] = [255]         #lake
+    rivers[np.where((water==[255,112,0]).all(axis=2))] = [255]      #ocean river
+    rivers[np.where((water==[255,128,0]).all(axis=2))] = [255]      #major river
+    rivers[np.where((water==[255,160,0]).all(axis=2))] = [255]      #river
+    rivers[np.where((water==[255,192,0]).all(axis=2))] = [255]      #minor river
+    rivers[np.where((water==[255,224,0]).all(axis=2))] = [255]      #stream
+    if(config.brook):
+            rivers[np.where((water==[255,255,0]).all(axis=2))] = [255]      #config.brook
+    
+    ret,riv_mask = cv.threshold(rivers,1,255,cv.THRESH_BINARY)
+    return riv_mask
+
+def draw_base(fn, color, svg_layers):
+    #Everything under the territories: elevation bands, isolines, vegetation, deserts, glaciers and water
+    #The masks are built side by side on the stage threads, then laid down one after another in this order
+    bathy_color = (color[0][2]*0.9,color[0][1]*0.9,color[0][0]*0.9)
+    ((opened, t, contours), (veg, veg_mask, veg_overlay), (desert, dmask), (glacier, gmask), riv_mask) = run_parallel(
+        (elevation_bands, fn, color), (vegetation_masks, fn), (desert_masks, fn), (glacier_masks, fn), (river_mask, fn))
+    #%%%ELEVATION
+    print("Drawing elevation...")
+    canv = cv.LUT(cv.merge([opened,opened,opened]), palette_lut(color))
+    #%%%CONTOURS
+    print("Drawing topology...")
+    for i,x in color.items():
+        if(i == 0): continue
+        if(i < 73): 
+            col = bathy_color
+        elif(i == 73):
+            col = config.sea_level_color
+            cv.drawContours(canv, contours[i], -1, col, 1)
+        elif(i < 123):
+            col = config.topology_color
+            cv.drawContours(canv, contours[i], -1, col, 1)
+        elif(i >= 123):
+            col = config.topology_color
+            cv.drawContours(canv, contours[i], -1, col, 1)
+        # cv.drawContours(canv, contours, -1, col, 1)
+        #img2 = grey.copy() 
+    #%%%VEGETATION
+    
+    print("Drawing vegetation...")
+    veg_top = cv.bitwise_and(canv,canv,mask=veg)
+    veg_top = cv.addWeighted(veg_top,1-config.veg_alpha,veg_overlay,config.veg_alpha,0)
+    
+    #cv.imshow("veg",veg_overlay)
+    #cv.waitKey(1)
+    
+    canv = cv.bitwise_and(canv,canv,mask=cv.bitwise_not(veg_mask))
+    canv = cv.add(canv,veg_top)
+    
+    
+    #%%%DESERT
+    print("Drawing deserts...")
+    desert_top = cv.bitwise_and(canv,canv,mask=dmask)
+    desert_top = cv.addWeighted(desert_top,1-config.desert_alpha,desert,config.desert_alpha,0)
+
+
+    canv = cv.bitwise_and(canv,canv,mask=cv.bitwise_not(dmask))
+    canv = cv.add(canv,desert_top)
+    
+    #%%%ICE
+    print("Drawing glaciers...")
+    glac_top = cv.bitwise_and(canv,canv,mask=gmask)
+    glac_top = cv.addWeighted(glac_top,1-config.glac_alpha,glacier,config.glac_alpha,0)
+    
+    canv = cv.bitwise_and(canv,canv,mask=cv.bitwise_not(gmask))
+    canv = cv.add(canv,glac_top)
+    
+    #cv.imshow("dd",canv)
+    #cv.waitKey(1)
+    
+
+    #%%%WATER
+    print("Drawing water...")
+    canv = cv.bitwise_and(canv,canv,mask=cv.bitwise_not(riv_mask))
+    
+    col = color[72]
+    rivers = cv.merge([riv_mask/255*col[2],riv_mask/255*col[1],riv_mask/255*col[0]])
+    canv = cv.add(np.uint8(canv),np.uint8(rivers))
+    if config.svg_export:
+        svg_layers["rivers"] = cv.findContours(riv_mask, cv.RETR_LIST, cv.CHAIN_APPROX_SIMPLE)[0]
+    return (canv, t)
+
+def read_world(file_path, flegends, pops):
+    #Legends plus the site owners and active wars, everything the maps need from the history
+    (legends_db, d_regions, d_sites, d_entities, d_hevent, d_hcoll) = load_legends(file_path, flegends)
+    mandatory = []
+    occ_sites = {}
+    ents = {}
+    active_wars = {}
+    #%%%SITES
+    if config.site_check:
+        print("Parsing pops...")
+        f1 = open(pops,'r',encoding='cp850',errors='ignore')
+        lines = f1.readlines()
+        flag = 0
+        for l in lines:
+            m = re.match("^(\d*):",l)
+            if(m):
+                flag = 1
+                (num, l) = l.split(": ")
+                (name, trans, typ) = l.split(", ")
+                d_sites[num]["trans"] = name
+        #           print(name,trans)
+                pop = 0
+            elif(re.match("Outdoor",l)):
+                break
+            elif(flag == 1 and re.match("\d ",l)): #any(char.isdigit() for char in l)): #need to fix, change to regex \d
+                 spl = l.split(" ")
+                 n = int(spl[0].strip())
+                 species = spl[1].strip()
+                 if(species in ["kobolds","dwarves","humans","elves","goblins"]):
+                     pop = pop + n
+                     d_sites[num]["pop"] = pop
+        
+        for c in d_sites:
+            if("pop" in d_sites[c] and d_sites[c]["pop"] > config.mand_pop):
+                 mandatory.append(d_sites[c]["name"])
+                 print(d_sites[c]["name"].title(),"has a population of",d_sites[c]["pop"])
+        
+        print("Calculating owners...")
+        event_types = ["created site","destroyed site","hf destroyed site","new site leader","reclaim site","site taken over"]
+        #nonevent = ["add hf entity link","change hf state","hf abducted","hf died","hf simple battle event","change hf job","add hf hf link","artifact copied","artifact created","artifact claim formed","written content composed","artifact stored","hfs formed reputation relationship","assume identity","attacked site","plundered site","hf wounded","add hf entity honor","item stolen","performance","hfs formed intrigue relationship","ceremony","competition","trade","agreement formed","changed creature type","add hf site link","artifact found","artifact given","artifact lost","artifact possessed","artifact recovered","body abused","change hf body state","creature devoured","dance form created","entity alliance formed","entity breach feature layer","entity equipment purchase","gamble","field battle","failed frame attempt","failed intrigue corruption","hf attacked site","hf confronted","hf convicted","hf does interaction","hf equipment purchase","hf gains secret goal","hf learns secret","hf new pet","hf prayed inside structure","hf profaned structure","hf recruited unit type for entity","hf relationship denied","hf reunion","hf revived","hf travel","hf viewed artifact","holy city declaration","musical form created","peace accepted","peace rejected","poetic form created","procession","remove hf entity link","remove hf hf link","remove hf site link","site dispute","hf preach","knowledge discovered","entity created","entity persecuted","created structure"]
+        fevent = {}
+        #unsorted = []
+        for e in d_hevent:
+            t = d_hevent[e]["type"]
+            if(t in event_types):
+                 fevent[e] = d_hevent[e]
+        #   elif(t in nonevent):
+        #           continue
+        #   else:
+        #           unsorted.append(t)
+        #           if("site_id" in d_hevent[e]):
+        #                   print(d_hevent[e])
+        #for x in sorted(set(unsorted)):
+        #   print(x)
+        
+        #           print(d_hevent[e])
+        #           if(t == "created site"):
+        #                   if(d_hevent[e]["civ_id"] == "-1"):
+        #                           continue
+        #                   print("In year "+d_hevent[e]["year"]+", "+d_entities[d_hevent[e]["civ_id"]]+" created "+d_sites[d_hevent[e]["site_id"]]["name"])
+        #           elif(t == "hf destroyed site"):
+        #                   print("In year "+d_hevent[e]["year"]+", "+d_sites[d_hevent[e]["site_id"]]["name"]+" of "+d_entities[d_hevent[e]["defender_civ_id"]]+" was destroyed.")
+        #           elif(t == "destroyed site"):
+        #                   print("In year "+d_hevent[e]["year"]+", "+d_sites[d_hevent[e]["site_id"]]["name"]+" of "+d_entities[d_hevent[e]["defender_civ_id"]]+" was destroyed.")
+        #           elif(t == "holy city declaration"):
+        #                   print("In year "+d_hevent[e]["year"]+", "+d_sites[d_hevent[e]["site_id"]]["name"]+" was declared a holy city.")
+        #           elif(t == "reclaim site"):
+        #                   print("In year "+d_hevent[e]["year"]+", "+d_sites[d_hevent[e]["site_id"]]["name"]+" was reclaimed by "+d_entities[d_hevent[e]["civ_id"]]+".")
+        #           elif(t == "site taken over"):
+        #                   print("In year "+d_hevent[e]["year"]+", "+d_sites[d_hevent[e]["site_id"]]["name"]+" was taken over by "+d_entities[d_hevent[e]["attacker_civ_id"]]+".")
+        #           elif(t == "new site leader"):
+        #                   print("In year "+d_hevent[e]["year"]+", "+d_sites[d_hevent[e]["site_id"]]["name"]+" was taken over by "+d_entities[d_hevent[e]["attacker_civ_id"]]+".")
+        #           else:
+        #                   print(d_hevent[e])
+            #event_types.append(d_hevent[e]["type"])
+        #event_types = sorted(set(event_types))
+        #for a in event_types:
+        #   print(a)
+        
+        government_owner = {}
+        civs = []
+        
+        for s in d_sites:
+            for e in fevent:
+                 if(fevent[e]["site_id"] == s):
+                     if(fevent[e]["type"] in ["created site","reclaim site"]):
+                         d_sites[s]["ruler"] = fevent[e]["civ_id"]
+                         if(int(fevent[e]["site_civ_id"]) != -1 and int(fevent[e]["civ_id"]) != -1):
+                             government_owner[int(fevent[e]["site_civ_id"])] = int(fevent[e]["civ_id"])
+                             if(fevent[e]["civ_id"] not in civs):
+                                 civs.append(fevent[e]["civ_id"])
+                     elif(fevent[e]["type"] in ["destroyed site","hf destroyed site"]):
+                         d_sites[s]["ruler"] = -1
+                     elif(fevent[e]["type"] in ["site taken over","new site leader"]):
+                         d_sites[s]["ruler"] = fevent[e]["attacker_civ_id"]
+                         government_owner[int(fevent[e]["new_site_civ_id"])] = int(fevent[e]["attacker_civ_id"])
+                         if(fevent[e]["attacker_civ_id"] not in civs and int(fevent[e]["attacker_civ_id"]) != -1 ):
+                             civs.append(fevent[e]["attacker_civ_id"])
+                     else:
+                         print("ERROR: Uncaught event "+fevent[e])
+        if config.legends_backend == "sqlite":
+            government_owner, civs = db_site_owners(legends_db, d_sites, event_types)
+        ents = {}
+        occ_sites = {}
+        for s in d_sites:
+            x = d_sites[s]
+            if("ruler" in x):
+                if(int(x["ruler"]) == -1):
+                     continue
+        #           print("The "+x["type"]+" of "+x["name"]+" at "+str(x["pos"])+" is owned by "+d_entities[x["ruler"]])
+                occ_sites[s] = x
+                if(x["ruler"] in ents):
+                    ents[x["ruler"]] += 1
+                else:
+                    ents[x["ruler"]] = 1
+        
+        #print(ents)
+        
+        nents = {}
+        for e in ents:
+            #print(d_entities[e].title()+" has "+str(ents[e])+" settlements.")
+            if(ents[e] > config.min_cities):
+                 nents[e] = ents[e]
+        ents = nents
+        #print("There are "+str(len(ents))+" civilizations with more than "+str(min_cities)+" settlements")
+        #print(ents,civs)
+        
+        ents = {}
+        for c in civs:
+            if(int(c) != -1):
+                 ents[c] = 10
+        #print(occ_sites)
+        
+        #%%%ACTIVE WARS
+        active_wars = {}
+        for e in d_hcoll:
+            if(d_hcoll[e]["type"] == "war" and d_hcoll[e]["end_year"] == "-1"):
+                     (a,b) = (int(d_hcoll[e]["aggressor_ent_id"]),int(d_hcoll[e]["defender_ent_id"]))
+                     if(b in government_owner):
+                            b = government_owner[b]
+                     if(a in government_owner):
+                            a = government_owner[a]
+                     if(a == b):
+                            #print(d_entities[str(a)].title(),"is embroiled in civil war in",d_hcoll[e]["name"].title())
+                            continue
+                     if(min(a,b) in active_wars):
+                            active_wars[min((a,b))].append(max((a,b)))
+                     else:
+                            active_wars[min((a,b))] = [max((a,b))]
+                     #print(d_entities[str(min(a,b))].title(),"is at war with",d_entities[str(max(a,b))].title(),"in",d_hcoll[e]["name"].title())
+        
+        for key in active_wars:
+            active_wars[key] = set(active_wars[key])
+        if config.legends_backend == "sqlite":
+            active_wars = db_active_wars(legends_db, government_owner)
+    return {"d_sites":d_sites,"occ_sites":occ_sites,"ents":ents,"active_wars":active_wars,"mandatory":mandatory}
+
+def base_stage(fn, color):
+    svg_layers = {"rivers":[],"paths":[],"borders":[]}
+    (canv, t) = draw_base(fn, color, svg_layers)
+    traced = world_isolines(fn, t[73].shape)
+    return {"canv":canv,"land":t[73],"svg":svg_layers,"isolines":{i:traced[i] for i in color if i in traced}}
+
+def draw_territories(state, world):
+    #%%% TERRITORY
+    (canv, land_bits, svg_layers) = (state["canv"], state["land"], state["svg"])
+    land = land_bits.unpack()
+    (d_sites, occ_sites, ents, active_wars) = (world["d_sites"], world["occ_sites"], world["ents"], world["active_wars"])
+    (maxx,maxy) = canv.shape[:2]
+    kernel = np.ones((px(3), px(3)), 'uint8')
+    print("Drawing territories...")
+    i = 0
+    k = cv.getStructuringElement(cv.MORPH_ELLIPSE,(px(15),px(15)))
+    
+    #VORONOI TERRITORY 2 ELECTRIC BOOGALGOO
+    delauny = np.zeros(canv.shape, dtype="uint8")
+    pts = []
+    rulers = []
+    for s in occ_sites:#d_sites:
+        if("ruler" in occ_sites[s] and int(occ_sites[s]["ruler"]) >= 0 and occ_sites[s]["ruler"] in ents):
+                ((x1,y1),(x2,y2)) = d_sites[s]["rect"]
+                x = int((int(x1)+int(x2))/2)
+                y = int((int(y1)+int(y2))/2)
+                pts.append((x,y))
+                rulers.append(int(d_sites[s]["ruler"]))
+                cv.circle(delauny,(x,y), px(2), (255,255,255), -1)
+    if(rulers == []):
+        print("No civ rules a site, no territories to draw.")
+        return dict(state, territories=[])
+
+    russet = sorted(set(rulers))
+    i = 0
+    for s in russet:
+        rulers = [i if s == x else x for x in rulers]
+        i = i + 1
+    
+    rect = (0, 0, maxy, maxx)
+    subdiv  = cv.Subdiv2D(rect);
+    for p in pts:
+        subdiv.insert(p)
+    
+    def draw_voronoi(img, subdiv) :
+    
+        (facets, centers) = subdiv.getVoronoiFacetList([])
+    
+        for i in range(0,len(facets)) :
+                ifacet_arr = []
+                for f in facets[i] :
+                        ifacet_arr.append(f)
+    
+                ifacet = np.array(ifacet_arr, np.intc)
+                color = (rulers[i],rulers[i],rulers[i])#ent_colors[rulers[i]]
+    
+                cv.fillConvexPoly(img, ifacet, color, cv.LINE_4, 0);
+                #ifacets = np.array([ifacet])
+            #cv.polylines(img, ifacets, True, (0, 0, 0), 1, cv.LINE_AA, 0)
+            #cv.circle(img, (centers[i][0], centers[i][1]), 3, (0, 0, 0), -1, cv.LINE_AA, 0)
+    
+    draw_voronoi(delauny,subdiv)
+    
+    facets = []
+    for i in range(0,max(rulers)+1):
+        facets.append(BitMask.pack((delauny==[i,i,i]).all(axis=2)))#ent_colors[i]
+    
+    #   terr = cv.bitwise_and(vp,vp,mask=t[73])
+    
+    #   terr_top = cv.bitwise_and(canv,canv,mask=terr)
+    #   terr_overlay = np.ones(img.shape,dtype="uint8")*[ent_colors[i][2],ent_colors[i][1],ent_colors[i][0]]
+    #   terr_overlay = cv.bitwise_and(terr_overlay,terr_overlay,mask=terr).astype(np.uint8)
+        
+    #   terr_top = cv.addWeighted(terr_top,1-terr_alpha,terr_overlay,terr_alpha,0)
+    #   canv = cv.bitwise_and(canv,canv,mask=cv.bitwise_not(terr))
+    #   canv = cv.add(canv,terr_top)
+    
+    ###################################################################################
+    i = 0
+    terrs = []
+    disp = []
+    for e in ents:
+        terr = np.zeros(canv.shape[:2], dtype="uint8")
+        occ_pts = []
+        for s in occ_sites:
+                if(occ_sites[s]["ruler"] == e):
+    #                   xy = occ_sites[s]["pos"]
+    #                   x = int(xy[0])*16
+    #                   y = int(xy[1])*16
+                        ((x1,y1),(x2,y2)) = occ_sites[s]["rect"]
+                        x = int((int(x1)+int(x2))/2)
+                        y = int((int(y1)+int(y2))/2)
+                        occ_pts = (x,y)
+                        #cv.rectangle(terr,(int(x),int(y)),(int(x+16),int(y+16)),(255),-1)
+                        cv.circle(terr,(x,y), px(8), (255), -1)
+                        
+                        rect = occ_sites[s]["rect"]
+        terr = cv.dilate(terr, k, iterations=10)
+        terr = cv.erode(terr, k, iterations=6)
+        
+    #   n = 0
+        ii = -1
+    #   for q in range(len(facets)):
+    #           m = cv.countNonZero(cv.bitwise_and(facets[q     ],terr))
+    #           if(m > n):
+    #                   n = m
+    #                   ii = q
+        if(occ_pts == []):
+                continue
+    
+        for q in range(len(facets)):
+                if(facets[q].get(occ_pts[0],occ_pts[1])):
+                        ii = q
+                        break;
+        #ii is the biggest voronoi cell(s)
+    #   print(ii,n)
+        
+        #Each mask keeps its civ, civs without a site are skipped so positions in ents do not line up
+        disp.append((int(e), BitMask.pack(terr)))
+        terr = cv.bitwise_and(terr,terr,mask=facets[ii].unpack())
+        terrs.append((int(e), BitMask.pack(terr)))
+    
+    for i,(c1,terr) in enumerate(terrs):
+        for (c2,uerr) in disp:
+                if((c1 in active_wars and c2 in active_wars[c1]) or (c2 in active_wars and c1 in active_wars[c2])):
+                        terr = terr.andnot(uerr)
+    
+        terr = (terr & land_bits).unpack()
+        terr_top = cv.bitwise_and(canv,canv,mask=terr)
+        if(i >= len(ent_colors)):
+                print("Error: Not enough colors in ent_colors")
+                i = i % len(ent_colors)
+        terr_overlay = np.ones(canv.shape,dtype="uint8")*[ent_colors[i][2],ent_colors[i][1],ent_colors[i][0]]
+        terr_overlay = cv.bitwise_and(terr_overlay,terr_overlay,mask=terr).astype(np.uint8)
+    
+        terr_top = cv.addWeighted(terr_top,1-config.terr_alpha,terr_overlay,config.terr_alpha,0)
+    
+        canv = cv.bitwise_and(canv,canv,mask=cv.bitwise_not(terr))
+        canv = cv.add(canv,terr_top)
+    #   i = i + 1
+    #################################################################################
+    diag_width = 1
+    diag_space = 0
+    
+    outerlay = np.zeros(canv.shape,dtype="uint8")
+    outermask = BitMask.zeros(canv.shape[:2])
+    for i,(c1,terr) in enumerate(terrs):
+        diag = np.zeros(canv.shape[:2],dtype="uint8")
+        for d in range(0,2*maxx,len(disp)*(diag_width+diag_space)):
+                        cv.line(diag,(maxy,d-maxx+i*(diag_width+diag_space)),(0,d+i*(diag_width+diag_space)),(255),diag_width)
+        
+        for j,(c2,uerr) in enumerate(disp):
+                m = 0
+                if((c1 in active_wars and c2 in active_wars[c1]) or (c2 in active_wars and c1 in active_wars[c2])):
+                        inter = disp[i][1] & uerr
+                        m = inter.count()
+                if(m > 0):
+                        inter = inter.unpack()
+                        if(i >= len(ent_colors)):
+                                i = i % len(ent_colors)
+                        overlay = np.ones(canv.shape,dtype="uint8")*[ent_colors[i][2],ent_colors[i][1],ent_colors[i][0]]
+                        mask = cv.bitwise_and(inter,diag)
+                        overlay = cv.bitwise_and(overlay,overlay,mask=mask).astype(np.uint8)
+                                
+                        eiag = np.zeros(canv.shape[:2],dtype="uint8")
+                        for d in range(0,2*maxx,len(terrs)*(diag_width+diag_space)):
+                                cv.line(eiag,(maxy,d-maxx+j*(diag_width+diag_space)),(0,d+j*(diag_width+diag_space)),(255),diag_width)
+                        
+                        if(j >= len(ent_colors)):
+                                j = j % len(ent_colors)
+    
+                        everlay = np.ones(canv.shape,dtype="uint8")*[ent_colors[j][2],ent_colors[j][1],ent_colors[j][0]]
+                        emask = cv.bitwise_and(inter,eiag)
+                        everlay = cv.bitwise_and(everlay,everlay,mask=emask).astype(np.uint8)
+                        
+                        fmask = cv.add(mask,emask)
+        
+                        overlay = cv.add(overlay,everlay)
+    
+                        templay = cv.bitwise_and(overlay,overlay,mask=(~outermask).unpack())
+                        outerlay = cv.add(outerlay,templay)
+                        outermask = outermask | BitMask.pack(fmask)
+    
+    
+    outermask = (outermask & land_bits).unpack()
+    outerlay = cv.bitwise_and(outerlay,outerlay,mask = outermask)
+    canv = cv.bitwise_and(canv,canv,mask=cv.bitwise_not(outermask))
+    canv = cv.add(canv,outerlay)
+    
+    #BORDERS
+    for i,(c1,terr) in enumerate(terrs):
+        terr = terr.unpack()
+        edges = cv.Canny(terr,0,0)
+        edges = cv.dilate(edges, kernel, iterations=1)
+        edges = cv.erode(edges, kernel, iterations=1)
+    #cv.imshow("d",edges)
+    #cv.waitKey(0)
+        edges = BitMask.pack(edges)
+        for (c2,uerr) in disp:
+                if((c1 in active_wars and c2 in active_wars[c1]) or (c2 in active_wars and c1 in active_wars[c2])):
+                        edges = edges.andnot(uerr)
+    
+        edges = (edges & land_bits).unpack()
+    
+        if(i >= len(ent_colors)):
+                i = i % len(ent_colors)
+        if config.svg_export:
+                border = cv.findContours(cv.bitwise_and(terr,terr,mask=land), cv.RETR_LIST, cv.CHAIN_APPROX_SIMPLE)[0]
+                svg_layers["borders"].append((border,ent_colors[i]))
+    
+        overlay = np.ones(canv.shape,dtype="uint8")*[ent_colors[i][2],ent_colors[i][1],ent_colors[i][0]]
+        overlay = cv.bitwise_and(overlay,overlay,mask=edges).astype(np.uint8)
+        canv = cv.bitwise_and(canv,canv,mask=cv.bitwise_not(edges))
+        canv = cv.add(canv,overlay)
+        
+    #vp = cv.dilate(vp, kernel, iterations=1)
+    #   vcont, hierarchy = cv.findContours(vp, cv.RETR_TREE, cv.CHAIN_APPROX_SIMPLE)
+    #   cv.drawContours(canv, vcont, -1, (0,0,0), 1, cv.LINE_4)
+    #   cv.imshow("d",canv)
+    #   cv.waitKey(0)
+    #Each civ's territory on land, in the order they were laid down, for render_world
+    territories = [(civ, terr & land_bits) for (civ,terr) in terrs]
+    return dict(state, canv=canv, territories=territories)
+
+def find_roads(fn, d_sites):
+    #Agriculture and merged road masks from the structure map, the slow part of the structures
+    print("Drawing structures...")
+    struct = load_layer(fn,"str")
+    #castle = BitMask.pack((struct==[128,128,128]).all(axis=2))       #castle
+    #village = BitMask.pack((struct==[255,255,255]).all(axis=2))      #village
+    tunnel = BitMask.pack((struct==[20,20,20]).all(axis=2))  #tunnel
+    sbridge = BitMask.pack((struct==[224,224,224]).all(axis=2))      #stone bridge
+    sroad = BitMask.pack((struct==[192,192,192]).all(axis=2))        #stone road
+    #swall = BitMask.pack((struct==[96,96,96]).all(axis=2))   #stone wall
+    bridge = BitMask.pack((struct==[20,167,180]).all(axis=2))        #other bridge
+    road = BitMask.pack((struct==[20,127,150]).all(axis=2))  #other road
+    #wall = BitMask.pack((struct==[20,127,160]).all(axis=2))  #other wall
+    
+    crop1 = BitMask.pack((struct==[0,128,255]).all(axis=2))  #crops (all crops are humans)
+    crop2 = BitMask.pack((struct==[0,160,255]).all(axis=2))  #crops
+    crop3 = BitMask.pack((struct==[0,192,255]).all(axis=2))  #crops
+    pasture = BitMask.pack((struct==[0,255,0]).all(axis=2))  #pasture (dwarves mostly, some human)
+    meadow = BitMask.pack((struct==[0,255,64]).all(axis=2))  #meadow
+    woodland = BitMask.pack((struct==[0,128,0]).all(axis=2)) #woodland
+    orchard = BitMask.pack((struct==[0,160,0]).all(axis=2))  #orchard (elves)
+    
+    #print("Drawing villages...")
+    #village = cv.dilate(village, kernel, iterations=2)
+    #village = cv.erode(village, kernel, iterations=1)
+    #vill_overlay = cv.merge([np.uint8(village/255*vill_color[2]),np.uint8(village/255*vill_color[1]),np.uint8(village/255*vill_color[0])])
+    #vill_top = cv.bitwise_and(canv,canv,mask=village)
+    #vill_top = cv.addWeighted(vill_top,1-vill_alpha,vill_overlay,vill_alpha,0)
+    #canv = cv.bitwise_and(canv,canv,mask=cv.bitwise_not(village))
+    #canv = cv.add(canv,vill_top)
+    
+    print("Drawing crops...")
+    crops = crop1 | crop2 | crop3
+    plain = pasture | meadow
+    woods = woodland | orchard
+    ag = (crops | plain | woods).unpack()
+    
+    
+    #convil, hierarchy = cv.findContours(village, 1, 2)
+    
+    #for c in convil:
+    #   M = cv.moments(c)
+    #   if(M["m00"] == 0):
+    #           print(M)
+    #           continue
+    #   cX = int(M["m10"] / M["m00"])
+    #   cY = int(M["m01"] / M["m00"])
+    #   radius = math.sqrt(cv.contourArea(c))/2
+        
+    #   if(radius < 5):
+    #           print(radius)
+    #           cv.circle(canv, (cX, cY), math.ceil(radius), (0,0,0), -1)
+    
+    #CASTLES
+    #print("Drawing castles...")
+    #castle = cv.dilate(castle, kernel, iterations=1)
+    #castle = cv.erode(castle, kernel, iterations=1)
+    #concast, hierarchy = cv.findContours(castle, 1, 2)
+    #for c in concast:
+    #   M = cv.moments(c)
+    #   if(M["m00"] == 0):
+    #           continue
+    #   cX = int(M["m10"] / M["m00"])
+    #   cY = int(M["m01"] / M["m00"])
+    #   radius = math.sqrt(cv.contourArea(c))/2
+        #print(radius)
+    #   cv.circle(canv, (cX, cY), math.floor(radius), (0,0,0), -1)
+    
+    print("Drawing roads...")
+    roads = road | sroad
+    bridges = bridge | sbridge
+    
+    path = (roads | bridges | tunnel).unpack()
+    
+    pts = []
+    for s in d_sites:
+        ((x1,y1),(x2,y2)) = d_sites[s]["rect"]
+        x = int((int(x1)+int(x2))/2)
+        y = int((int(y1)+int(y2))/2)
+        pts.append((x,y))
+        #cv.circle(path,(x,y), 1, (255), -1)
+    
+    #corners = cv.goodFeaturesToTrack(path, 200, 0.05, 16)
+    #hole = []
+    #for i in range(0,len(corners)):
+    #   for j in range(i+1,len(corners)):
+    #           x1,y1 = corners[i].ravel()
+    #           x2,y2 = corners[j].ravel()
+    #           w = 16
+    #           if abs(x1-x2)<=w and abs(y1-y2)<=w:
+    #                   hole.append((x1,y1,x2,y2))
+    #                   cv.circle(path,(int(x1),int(y1)), 3, (255), -1)
+    #for h in hole:
+    #   (x1,y1,x2,y2) = h
+    #   cv.line(path,(int(x1),int(y1)),(int(x2),int(y2)),(255),1)
+    
+    #cv.imshow("p",path)
+    
+    print("Merging roads...")
+    
+    cnt, hierarchy = cv.findContours(path, cv.RETR_TREE, cv.CHAIN_APPROX_SIMPLE)
+    clen = len(cnt)
+    clon = -1
+    if(config.process_road == False):
+        clon = clen
+    for it in range(math.ceil(math.sqrt(clen))):
+        holes = []
+        cnt, hierarchy = cv.findContours(path, cv.RETR_TREE, cv.CHAIN_APPROX_SIMPLE)
+        clen = len(cnt)
+        if(clon == clen):
+                print("Roads done.")
+                break
+        clon = clen
+        print(it,":",clen,"contours")
+        #Closest pair of points between each contour and any later one, found through a grid hash instead of every pair
+        (points, owner) = contour_points(cnt)
+        index = PointIndex(points)
+        first = 0
+        for i in range(len(cnt)):
+                best = None
+                for pi_n in range(first, first+len(cnt[i])):
+                        (x1,y1) = index.points[pi_n]
+                        for (d,n) in index.near(x1,y1,px(32)):
+                                if(owner[n] > i and (best is None or (d,owner[n],pi_n,n) < best)):
+                                        best = (d,owner[n],pi_n,n)
+                first += len(cnt[i])
+                if(best is not None and best[0] < px(32)):
+                        holes.append((index.points[best[2]],index.points[best[3]]))
+        for h in holes:
+                cv.line(path,h[0],h[1],(255),1)
+    #   cv.imshow("l",path)
+    #   cv.waitKey(1)
+    
+    if config.draw_offramps:
+        print("Drawing offramps...")
+        #Links sites sitting in farmland to the road passing by them
+        cnt, hierarchy = cv.findContours(path, cv.RETR_TREE, cv.CHAIN_APPROX_SIMPLE)
+        (points, owner) = contour_points(cnt, dense=True)
+        edges = PointIndex(points)
+        ramps = []
+        for b in pts:
+                near = edges.near(b[0],b[1],px(16))
+                if(near == [] or near[0][0] >= px(16)):
+                        continue
+                a = edges.points[near[0][1]]
+                #Only sites cut off from the road by farmland get one
+                steps = max(abs(a[0]-b[0]),abs(a[1]-b[1])) + 1
+                xs = np.rint(np.linspace(b[0],a[0],steps)).astype(int)
+                ys = np.rint(np.linspace(b[1],a[1],steps)).astype(int)
+                if(np.count_nonzero(ag[ys,xs]) > px(5)):
+                        ramps.append((a,b))
+        for (a,b) in ramps:
+                cv.line(path,a,b,(255),1)
+        print(len(ramps),"offramps")
+    
+    #for p in pts:
+    #   cv.circle(path,p, 1, (127), -1)
+    
+    #cv.imshow("d",path)
+    #cv.waitKey(0)
+    paths = []
+    if config.svg_export:
+        paths = cv.findContours(path, cv.RETR_LIST, cv.CHAIN_APPROX_SIMPLE)[0]
+    return {"ag":BitMask.pack(ag),"path":BitMask.pack(path),"paths":paths}
+
+def draw_structures(state, roads):
+    #%%%STRUCTURES
+    (canv, ag, path) = (state["canv"], roads["ag"].unpack(), roads["path"].unpack())
+    state["svg"]["paths"] = roads["paths"]
+    ag_overlay = cv.merge([np.uint8(ag/255*config.ag_color[2]),np.uint8(ag/255*config.ag_color[1]),np.uint8(ag/255*config.ag_color[0])])
+    ag_top = cv.bitwise_and(canv,canv,mask=ag)
+    ag_top = cv.addWeighted(ag_top,1-config.ag_alpha,ag_overlay,config.ag_alpha,0)
+    canv = cv.bitwise_and(canv,canv,mask=cv.bitwise_not(ag))
+    canv = cv.add(canv,ag_top)
+    path_overlay = cv.merge([np.uint8(path/255*config.path_color[2]),np.uint8(path/255*config.path_color[1]),np.uint8(path/255*config.path_color[0])])
+    canv = cv.bitwise_and(canv,canv,mask=cv.bitwise_not(path))
+    canv = cv.add(canv,path_overlay)
+    return dict(state, canv=canv)
+
+def draw_grid(state):
+    #%%%GRID
+    canv = state["canv"]
+    print("Drawing grid...")
+    size = len(canv)
+    grid_spacing = px(43)
+    grid_width = 1
+    grid_color = [200,200,200]
+    grid_offset = px(5)
+    #grid_alpha = .7
+    for i in range(grid_offset, grid_width + grid_offset):    
+        canv[i:size:grid_spacing,:] = grid_color
+        canv[:,i:size:grid_spacing] = grid_color
+    return state
+
+def prefetch(folder):
+    #Everything generate reads before it can draw: the legends stage and the decoded layers
+    (file_path, fn, flegends, pops, wh) = find_files(folder)
+    stages = StageCache(file_path + "stages/", dict(fn, legends=flegends, pops=pops))
+    stages.key("legends")
+    #The legends are parsed while the maps decode
+    (world, *npys) = run_parallel((stages.memo, "legends", read_world, file_path, flegends, pops),
+                                  *[(decode_layer, fn, key) for key in layer_modes if key in fn])
+    return world
+
+def draw_map(palette, fn, world, names, stages):
+    #One palette of a world, from the cached stages through the labels and title
+    #Returns the finished image, the last stage's state with the site points drawn on a copy of its canvas, and the vector layers
+    titlefont = load_font(config.title_size)
+    subtitlefont = load_font(config.subtitle_size)
+    font = load_font(config.font_size)
+    subfont = load_font(config.sub_size)
+    d_sites = world["d_sites"]
+    (worldtransname, worldname) = names
+    color = palette_dict[palette]
+    
+    #Pick up after the last stage whose inputs have not changed
+    stages.key("base", sorted(color.items()))
+    stages.key("territory", ent_colors)
+    stages.key("roads")
+    stages.key("structures")
+    stages.key("grid")
+    todo = ["base"]
+    todo += ["territory"] if config.territory_check else []
+    todo += ["structures"] if config.structure_check else []
+    todo += ["grid"] if config.grid_draw else []
+    state = None
+    for i in reversed(range(len(todo))):
+        if stages.cached(todo[i], palette):
+            state = stages.load(todo[i], palette)
+            todo = todo[i+1:]
+            break
+    #The roads only need the structure map, so they are found on a stage thread while the base and territories draw
+    if "structures" in todo:
+        roads = stage_submit(stages.memo, "roads", find_roads, fn, d_sites)
+    for name in todo:
+        if(name == "base"):
+            state = base_stage(fn, color)
+        elif(name == "territory"):
+            state = draw_territories(state, world)
+        elif(name == "structures"):
+            state = draw_structures(state, roads.result())
+        elif(name == "grid"):
+            state = draw_grid(state)
+        stages.store(name, state, palette)
+    world_isolines(fn, state["land"].shape).update(state["isolines"])
+    #The site points go on a copy, the stage's canvas may be held by the stage cache and drawn from again
+    canv = state["canv"].copy()
+    state = dict(state, canv=canv)
+    svg_layers = dict(state["svg"], isolines=state["isolines"], points=[], labels=[], boxes=[])
+    (maxx,maxy) = canv.shape[:2]
+    
+    #%%%LABELS
+    print("Drawing labels...")
+    bigprint = ["tower","dark fortress","castle",]
+    medprint = ["town","fort","monastery","tomb","fortress","labyrinth","mountain halls"]
+    smallprint = ["dark pits","hillocks","hamlet","forest retreat"]
+    noprint = ["camp","cave","lair","vault","shrine"]
+    typeprint = ["tower","dark fortress","fortress","castle"]
+    
+    marquee = []
+    im = Image.fromarray(canv[:,:,::-1])
+    im = im.convert("RGBA")
+    overlap = np.zeros(canv.shape[:2], dtype="uint8")
+    label_mask = np.zeros(canv.shape[:2], dtype="uint8")
+    
+    if config.other_labels_check:
+        ###############################
+        for s in d_sites:
+            if(d_sites[s]["name"] in config.mandatory_cities):
+                    marquee.append(s)
+        
+        for s in d_sites:
+            if (d_sites[s]["type"] in bigprint+medprint+smallprint or d_sites[s]["name"] in config.mandatory_cities):
+                    ((x1,y1),(x2,y2)) = d_sites[s]["rect"]
+                    x = int((int(x1)+int(x2))/2)
+                    y = int((int(y1)+int(y2))/2)
+        
+                    if(d_sites[s]["type"] in bigprint):
+                            size = config.big_point
+                    elif(d_sites[s]["type"] in medprint):
+                            size = config.med_point
+                    else:
+                            size = config.small_point
+        
+                    if(d_sites[s]["type"] in typeprint or d_sites[s]["name"] in config.mandatory_cities):
+                            col = config.label_pcolor
+                    else:
+                            col = config.point_pcolor
+                    
+                    if(d_sites[s]["type"] in typeprint and s not in marquee):
+                            marquee.append(s)
+                            
+                    cv.circle(canv,(x,y), size, col, -1)
+                    svg_layers["points"].append((x,y,size,col))
+        
+        #           print(x,y,d_sites[s]["rect"])
+            elif(d_sites[s]["type"] in noprint):
+                    continue
+            else:
+                    print(d_sites[s]["type"])
+        
+        
+        
+        #Most important first: mandatory cities, then the typeprint types, then the biggest populations
+        marquee.sort(key=lambda s: (d_sites[s]["name"] in config.mandatory_cities, d_sites[s]["type"] in typeprint, d_sites[s].get("pop",0)), reverse=True)
+        labels = []
+        for s in marquee:
+            
+            ((x1,y1),(x2,y2)) = d_sites[s]["rect"]
+            x = int((int(x1)+int(x2))/2)
+            y = int((int(y1)+int(y2))/2)            
+            
+            subtext = ""
+            if("trans" in d_sites[s]):
+                    if(d_sites[s]["trans"][0].isascii()):
+                            text = d_sites[s]["trans"].title()
+                    else:
+                            text = d_sites[s]["trans"]
+                    subtext = d_sites[s]["name"].title()
+            else:
+                    text = d_sites[s]["name"].title()
+                    
+            bbox = textbbox(text, font)
+            textsize = (bbox[2] - bbox[0], bbox[3] - bbox[1])
+            bbox2 = textbbox(subtext, subfont)
+            textsize2 = (bbox2[2] - bbox2[0], bbox2[3] - bbox2[1])
+            labels.append((s, text, subtext, label_candidates(x, y, textsize, textsize2, canv.shape)))
+        
+        chosen = place_labels([l[3] for l in labels], config.label_budget)
+        for ((s, text, subtext, cands), k) in zip(labels, chosen):
+            if(k is None):
+                    print(d_sites[s]["name"],"label clash")
+                    continue
+            (anchor, pos, subpos, box) = cands[k]
+            cv.rectangle(overlap,(box[0],box[3]),(box[2],box[1]),(255),-1)
+            svg_layers["boxes"].append((s,text,box))
+            svg_layers["labels"].append((pos[0],pos[1],anchor,text,config.font_size))
+            svg_layers["labels"].append((subpos[0],subpos[1],"ma",subtext,config.sub_size))
+            if config.glyph_atlas:
+                blit_text(label_mask,pos,text,font,anchor)
+                blit_text(label_mask,subpos,subtext,subfont,"ma")
+                continue
+
+            #Shadows
+            back = Image.new("RGBA", (maxx,maxy))
+            draw = ImageDraw.Draw(back)
+            draw.text(pos,text,font = font,anchor=anchor,fill=(0,0,0,255))
+            draw.text(subpos,subtext,font = subfont,anchor="ma",fill=config.blur_color)
+            back = back.filter(ImageFilter.GaussianBlur(radius=px(3)))
+            back.alpha_composite(back)
+            back.alpha_composite(back)
+
+            #Text
+            draw = ImageDraw.Draw(back)
+            draw.text(pos,text,font = font,anchor=anchor,color=config.label_color)
+            draw.text(subpos,subtext,font = subfont,color=config.label_color,anchor="ma")
+            im.alpha_composite(back)
+    
+    #%%%PRINT WORLDNAME
+    if not config.title_draw:
+        if config.glyph_atlas:
+            compose_labels(im,label_mask)
+        return (im, state, svg_layers)
+    titlebox = textbbox(worldtransname, titlefont)
+    titlesize = (titlebox[2] - titlebox[0], titlebox[3] - titlebox[1])
+    subbox = textbbox(worldname, subtitlefont)
+    subsize = (subbox[2] - subbox[0], subbox[3] - subbox[1])
+    if(config.title_align == ""):
+            n = 999
+            for i in ["tl","tr","bl","br"]:
+                    titlebox = np.zeros(canv.shape[:2], dtype="uint8")
+                    if(i == "tl"):
+                            anchor = "la"
+                            (x,y) = (0+config.titleadjust[0],0+config.titleadjust[1])
+                            (x1,y1) = (int(x+titlesize[0]/2),y+titlesize[1])
+                            cv.rectangle(titlebox,(x,y),(x+titlesize[0],y+titlesize[1]),(255),-1)   
+                            cv.rectangle(titlebox,(int(x1-subsize[0]/2),y1),(int(x1+subsize[0]/2),y+titlesize[1]),(255),-1)
+                    elif(i == "tr"):
+                            anchor = "ra"
+                            (x,y) = (maxx-config.titleadjust[0],0+config.titleadjust[1])
+                            (x1,y1) = (int(x-titlesize[0]/2),y+titlesize[1])
+                            cv.rectangle(titlebox,(x-titlesize[0],y),(x,y+titlesize[1]),(255),-1)   
+                            cv.rectangle(titlebox,(int(x1-subsize[0]/2),y1),(int(x1+subsize[0]/2),y+titlesize[1]),(255),-1)
+                    elif(i == "bl"):
+                            anchor = "ld"
+                            (x,y) = (0+config.titleadjust[0],maxy-config.titleadjust[1]-subsize[1])
+                            (x1,y1) = (int(x+titlesize[0]/2),y)
+                            cv.rectangle(titlebox,(x,y-titlesize[1]),(x+titlesize[0],y),(255),-1)   
+                            cv.rectangle(titlebox,(int(x1-subsize[0]/2),y1),(int(x1+subsize[0]/2),y+titlesize[1]),(255),-1)
+                    elif(i == "br"):
+                            anchor = "rd"
+                            (x,y) = (maxx-config.titleadjust[0],maxy-config.titleadjust[1]-subsize[1])
+                            (x1,y1) = (int(x-titlesize[0]/2),y)
+                            cv.rectangle(titlebox,(x-titlesize[0],y-titlesize[1]),(x,y),(255),-1)   
+                            cv.rectangle(titlebox,(int(x1-subsize[0]/2),y1),(int(x1+subsize[0]/2),y+titlesize[1]),(255),-1)
+                    m = cv.countNonZero(cv.bitwise_and(titlebox,overlap))
+                    if(m < n):
+                            n = m
+                            config.title_align = i
+            print("Autotitle in",config.title_align)
+    
+    #titlesize = (max(titlesize[0],subsize[0]),titlesize[1])
+    
+    if(config.title_align == "tm"):
+            anchor = "ma"
+            (x,y) = (maxx/2,0+config.titleadjust[1])
+            (x1,y1) = (x,y+titlesize[1])
+    if(config.title_align == "tl"):
+            anchor = "la"
+            (x,y) = (0+config.titleadjust[0],0+config.titleadjust[1])
+            (x1,y1) = (x+titlesize[0]/2,y+titlesize[1])
+    elif(config.title_align == "tr"):
+            anchor = "ra"
+            (x,y) = (maxx-config.titleadjust[0],0+config.titleadjust[1])
+            (x1,y1) = (x-titlesize[0]/2,y+titlesize[1])
+    elif(config.title_align == "bl"):
+            anchor = "ld"
+            (x,y) = (0+config.titleadjust[0],maxy-config.titleadjust[1]-subsize[1])
+            (x1,y1) = (x+titlesize[0]/2,y)
+    elif(config.title_align == "br"):
+            anchor = "rd"
+            (x,y) = (maxx-config.titleadjust[0],maxy-config.titleadjust[1]-subsize[1])
+            (x1,y1) = (x-titlesize[0]/2,y)
+    
+    if config.glyph_atlas:
+        blit_text(label_mask,(x,y),worldtransname,titlefont,anchor)
+        blit_text(label_mask,(x1,y1),worldname,subtitlefont,"ma")
+        compose_labels(im,label_mask)
+    else:
+        back = Image.new("RGBA", (maxx,maxy))
+        draw = ImageDraw.Draw(back)
+        draw.text((x,y),worldtransname,font = titlefont,anchor=anchor,fill=(0,0,0,255))
+        draw.text((x1,y1),worldname,font = subtitlefont,anchor="ma",fill=config.blur_color)
+        back = back.filter(ImageFilter.GaussianBlur(radius=px(3)))
+        back.alpha_composite(back)
+        back.alpha_composite(back)
+
+        draw = ImageDraw.Draw(back)
+        draw.text((x,y),worldtransname,font = titlefont,anchor=anchor,color=config.label_color)
+        draw.text((x1,y1),worldname,font = subtitlefont,anchor="ma",color=config.label_color)
+        im.alpha_composite(back)
+    svg_layers["labels"].append((x,y,anchor,worldtransname,config.title_size))
+    svg_layers["labels"].append((x1,y1,"ma",worldname,config.subtitle_size))
+    return (im, state, svg_layers)
+
+def territory_map(territories, shape):
+    #One uint16 map of who holds every pixel, 0 for nobody and i+1 for the i-th civ of territories
+    owners = np.zeros(shape, np.uint16)
+    for i,(civ,terr) in enumerate(territories):
+        owners[terr.unpack() > 0] = i+1
+    return owners
+
+def render_world(folder, palettes=None, options=None, layers=False, world=None):
+    #Draws folder in memory and yields (palette, result) one palette at a time, nothing is written to Maps
+    #result["image"] is the finished PIL RGBA map, result["canvas"] the BGR array under the labels and result["svg"] its vector layers
+    #With layers, result also has "civs" and "territories" (territory_map), "roads" and "farmland" masks and the placed "labels" as (site, text, box)
+    #options are config names set while the world draws, every palette's canvas and masks are new arrays the caller may change
+    options = options or {}
+    saved = {n:getattr(config, n) for n in list(options) + ["title_align","mandatory_cities"]}
+    try:
+        for n in options:
+            setattr(config, n, options[n])
+        layer_cache.clear()
+        (file_path, fn, flegends, pops, wh) = find_files(folder)
+        stages = StageCache(file_path + "stages/", dict(fn, legends=flegends, pops=pops))
+        stages.key("legends")
+        if world is None:
+            world = stages.memo("legends", read_world, file_path, flegends, pops)
+        config.mandatory_cities = config.mandatory_cities + world["mandatory"]
+        names = world_names(wh)
+        for palette in palettes or palette_dict:
+            print(f"Beginning {palette} map generation")
+            (im, state, svg_layers) = draw_map(palette, fn, world, names, stages)
+            result = {"name":names[0],"image":im,"canvas":state["canv"],"svg":svg_layers}
+            if layers:
+                territories = state.get("territories")
+                result["civs"] = None if territories is None else [civ for (civ,terr) in territories]
+                result["territories"] = None if territories is None else territory_map(territories, state["canv"].shape[:2])
+                roads = stages.memo("roads", find_roads, fn, world["d_sites"]) if config.structure_check else None
+                result["roads"] = None if roads is None else roads["path"].unpack()
+                result["farmland"] = None if roads is None else roads["ag"].unpack()
+                result["labels"] = svg_layers["boxes"]
+            yield (palette, result)
+    finally:
+        for n in saved:
+            setattr(config, n, saved[n])
+
+def generate(folder, world=None):
+    print("Beginning generation of "+folder)
+    writer = MapWriter()
+    try:
+        #Writing the maps out is just one consumer of render_world
+        for (palette, result) in render_world(folder, world=world):
+            if config.show_maps:
+                result["image"].show()
+            print("Saving to file...")
+            writer.save(result["image"], f"{config.output_path}{result['name']} - {palette}")
+            if config.svg_export:
+                write_svg(f"{config.output_path}{result['name']} - {palette}.svg", result["canvas"].shape[:2], palette_dict[palette], result["svg"])
+            print(f"{palette} map generated.")
+            print("---------------------------")
+            name = result["name"]
+    finally:
+        writer.close()
+    print(f"All maps generated for {name}")
+    print("---------------------------")
+
+def generate_all(folders):
+    #World N+1 is prefetched on a background thread while world N renders, never more than prefetch_depth ahead
+    folders = list(folders)
+    pool = ThreadPoolExecutor(max_workers=1)
+    pending = deque()
+    queued = 0
+    try:
+        for folder in folders:
+            while(queued < len(folders) and len(pending) <= config.prefetch_depth):
+                pending.append(pool.submit(prefetch, folders[queued]))
+                queued += 1
+            generate(folder, pending.popleft().result())
+    finally:
+        for job in pending:
+            job.cancel()
+        pool.shutdown()
@@ -0,0 +1,160 @@
+import io
+import os
+import sys
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+
+from . import config
+from .palettes import palette_dict
+from .layers import layer_modes, layer_cache, decode_layer, load_layer, isoline_cache
+from .bitmask import BitMask
+from .stages import StageCache
+from .render import find_files, world_names, read_world, draw_map
+
+
+#%%%RENDER SERVER
+server_options = ["territory_check","structure_check","grid_draw","other_labels_check"] #toggles a request may set
+
+def held_nbytes(obj):
+    #Rough size of what a world keeps in memory: its arrays and masks in full, the legends by their Python objects
+    if isinstance(obj, (np.ndarray, BitMask)):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(held_nbytes(k) + held_nbytes(v) for (k,v) in obj.items())
+    if isinstance(obj, (list, tuple, set)):
+        return sys.getsizeof(obj) + sum(held_nbytes(v) for v in obj)
+    return sys.getsizeof(obj)
+
+class World:
+    #Everything about a world that does not depend on the palette, kept between requests
+    def __init__(self, folder):
+        print("Loading "+folder)
+        (file_path, self.fn, flegends, pops, wh) = find_files(folder)
+        self.stages = StageCache(file_path + "stages/", dict(self.fn, legends=flegends, pops=pops))
+        self.stages.key("legends")
+        self.world = self.stages.memo("legends", read_world, file_path, flegends, pops)
+        self.names = world_names(wh)
+        self.npys = [decode_layer(self.fn, key) for key in layer_modes if key in self.fn]
+        self.layers = [load_layer(self.fn, key) for key in layer_modes if key in self.fn]
+
+    def isolines(self):
+        #The traced isolines of this world's elevation, kept in isoline_cache whatever size they were drawn at
+        return [key for key in list(isoline_cache) if key[0] in self.npys]
+
+    def nbytes(self):
+        return (sum(l.nbytes for l in self.layers) + held_nbytes(self.stages.memory)
+                + sum(held_nbytes(isoline_cache.get(key, {})) for key in self.isolines()))
+
+class WorldCache:
+    #Least recently used worlds are dropped once their layers, stages and isolines go over server_cache_mb
+    def __init__(self):
+        self.worlds = OrderedDict()
+
+    def get(self, folder):
+        if folder in self.worlds:
+            self.worlds.move_to_end(folder)
+        else:
+            self.worlds[folder] = World(folder)
+            while(len(self.worlds) > 1 and sum(w.nbytes() for w in self.worlds.values()) > config.server_cache_mb*2**20):
+                (old, w) = self.worlds.popitem(last=False)
+                print("Dropping "+old)
+                for npy in w.npys:
+                    layer_cache.pop(npy, None)
+                for key in w.isolines():
+                    isoline_cache.pop(key, None)
+                w.stages.memory.clear()
+        return self.worlds[folder]
+
+class Renderer:
+    def __init__(self):
+        self.cache = WorldCache()
+        self.lock = threading.Lock() #config and the layer caches are shared, so one render at a time
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+
+    def render(self, folder, palette, options):
+        #Identical requests that arrive while one is being drawn all wait for that one
+        key = (folder, palette, tuple(sorted(options.items())))
+        with self.pending_lock:
+            job = self.pending.get(key)
+            owner = job is None
+            if owner:
+                job = self.pending[key] = Future()
+        if not owner:
+            return job.result()
+        #A failed render is taken out of pending too, so the next request for it draws it again
+        try:
+            job.set_result(self.draw(folder, palette, options))
+        except BaseException as e:
+            job.set_exception(e)
+        finally:
+            with self.pending_lock:
+                del self.pending[key]
+        return job.result()
+
+    def draw(self, folder, palette, options):
+        with self.lock:
+            w = self.cache.get(folder)
+            saved = {n:getattr(config, n) for n in list(options) + ["title_align","mandatory_cities"]}
+            try:
+                for n in options:
+                    setattr(config, n, options[n])
+                config.mandatory_cities = saved["mandatory_cities"] + w.world["mandatory"]
+                (im, state, svg_layers) = draw_map(palette, w.fn, w.world, w.names, w.stages)
+            finally:
+                for n in saved:
+                    setattr(config, n, saved[n])
+        out = io.BytesIO()
+        im.save(out, "PNG", compress_level=1)
+        return out.getvalue()
+
+def handler(renderer):
+    class Handler(BaseHTTPRequestHandler):
+        #GET /render?world=<folder>&palette=<name>&territory_check=1 returns the PNG, GET /worlds lists the folders
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {k:v[-1] for k,v in parse_qs(url.query).items()}
+            if(url.path == "/worlds"):
+                folders = sorted(f for f in os.listdir(config.root_path) if f != "Complete" and os.path.isdir(config.root_path + f))
+                return self.reply(200, "application/json", json.dumps({"worlds":folders,"palettes":list(palette_dict)}).encode())
+            if(url.path != "/render"):
+                return self.reply(404, "text/plain", b"Not found\n")
+            folder = query.get("world","")
+            palette = query.get("palette",next(iter(palette_dict)))
+            if(palette not in palette_dict or folder in ["","Complete"] or "/" in folder or ".." in folder):
+                return self.reply(400, "text/plain", b"Unknown world or palette\n")
+            options = {n:query[n] not in ["0","false","False",""] for n in server_options if n in query}
+            try:
+                png = renderer.render(folder, palette, options)
+            except FileNotFoundError:
+                return self.reply(404, "text/plain", b"No such world\n")
+            except Exception as e:
+                #Every request waiting on this render gets the same answer, none is left hanging
+                print(f"ERROR: {palette} map of {folder} failed: {e!r}")
+                return self.reply(500, "text/plain", f"Render failed: {e}\n".encode())
+            self.reply(200, "image/png", png)
+
+        def reply(self, code, kind, body):
+            self.send_response(code)
+            self.send_header("Content-Type", kind)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            for i in range(0, len(body), 1 << 16):
+                self.wfile.write(body[i:i + (1 << 16)])
+    return Handler
+
+def serve():
+    config.show_maps = False
+    server = ThreadingHTTPServer((config.server_host, config.server_port), handler(Renderer()))
+    print(f"Serving maps of {config.root_path} on http://{config.server_host}:{config.server_port}/render?world=<folder>&palette=<palette>")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
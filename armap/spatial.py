@@ -0,0 +1,45 @@
+import math
+import numpy as np
+
+
+#%%%SPATIAL INDEX
+class PointIndex:
+    #Uniform grid hash over points, a radius query only looks at the cells the circle touches
+    def __init__(self, points, cell=16):
+        self.points = [tuple(p) for p in np.asarray(points).reshape(-1,2).tolist()]
+        self.cell = cell
+        self.grid = {}
+        for n,(x,y) in enumerate(self.points):
+            self.grid.setdefault((x//cell,y//cell),[]).append(n)
+
+    def near(self, x, y, r):
+        #(distance, index) of every point within r of (x,y), closest first
+        c = self.cell
+        out = []
+        for gx in range(int(math.floor(x-r))//c, int(math.floor(x+r))//c+1):
+            for gy in range(int(math.floor(y-r))//c, int(math.floor(y+r))//c+1):
+                for n in self.grid.get((gx,gy),()):
+                    (px,py) = self.points[n]
+                    d = math.sqrt((px-x)**2 + (py-y)**2)
+                    if(d <= r):
+                        out.append((d,n))
+        out.sort()
+        return out
+
+def contour_points(cnt, dense=False):
+    #Points of every contour and the contour each belongs to, dense also fills in the straight runs CHAIN_APPROX_SIMPLE skips
+    points = []
+    owner = []
+    for i,c in enumerate(cnt):
+        c = c.reshape(-1,2)
+        if dense and len(c) > 1:
+            steps = []
+            for (p,q) in zip(c, np.roll(c,-1,axis=0)):
+                n = int(max(abs(q[0]-p[0]),abs(q[1]-p[1])))
+                steps.append(np.rint(np.linspace(p,q,n,endpoint=False)).astype(int) if n else p[None])
+            c = np.concatenate(steps)
+        points.append(c)
+        owner += [i]*len(c)
+    if(points == []):
+        return (np.zeros((0,2),int), [])
+    return (np.concatenate(points), owner)
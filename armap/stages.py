@@ -0,0 +1,83 @@
+import os
+import zlib
+import pickle
+import hashlib
+
+from . import config
+from .functions import tmp_name
+
+
+#%%%STAGES
+stage_version = 4 #bump when a stage draws differently so old caches are not reused
+#stage: (input files, config constants it reads, stages it builds on)
+stage_graph = {
+    "legends": (["legends","pops"], ["site_check","min_cities","mand_pop"], []),
+    "base": (["el","veg","bm","hyd"], ["palette_gradient","sea_level_color","topology_color","veg_type","veg_green","veg_alpha",
+                                       "desert_alpha","glac_alpha","brook","isoline_epsilon","svg_export","draw_scale"], []),
+    "territory": ([], ["territory_check","terr_alpha","svg_export","draw_scale"], ["base","legends"]),
+    "roads": (["str"], ["process_road","draw_offramps","svg_export","draw_scale"], ["legends"]),
+    "structures": ([], ["structure_check","ag_color","ag_alpha","path_color"], ["territory","roads"]),
+    "grid": ([], ["grid_draw","draw_scale"], ["structures"]),
+}
+
+class StageCache:
+    #Keys every stage by its input files, config constants and upstream keys, results are pickled in cache_dir
+    def __init__(self, cache_dir, files):
+        self.cache_dir = cache_dir
+        self.files = files
+        self.keys = {}
+        self.memory = {} #memo results stay in memory for as long as this cache is alive
+
+    def key(self, name, extra=()):
+        (files, names, upstream) = stage_graph[name]
+        parts = [stage_version, name, extra]
+        for f in files:
+            st = os.stat(self.files[f])
+            parts.append((f, os.path.basename(self.files[f]), st.st_size, st.st_mtime_ns))
+        parts += [(n, getattr(config, n)) for n in names]
+        parts += [self.keys[u] for u in upstream]
+        self.keys[name] = hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+        return self.keys[name]
+
+    def path(self, name, tag=""):
+        prefix = f"{name}-{tag}" if tag else name
+        return f"{self.cache_dir}{prefix}-{self.keys[name]}.pkl"
+
+    def cached(self, name, tag=""):
+        return config.stage_cache and os.path.exists(self.path(name, tag))
+
+    def load(self, name, tag=""):
+        print(f"Reusing cached {name} stage.")
+        with open(self.path(name, tag),"rb") as f:
+            return pickle.loads(zlib.decompress(f.read()))
+
+    def store(self, name, out, tag=""):
+        if not config.stage_cache:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.path(name, tag)
+        #Only the newest result of each stage is kept
+        prefix = os.path.basename(path)[:-len(self.keys[name])-4]
+        for f in os.listdir(self.cache_dir):
+            if(f.startswith(prefix) and f.endswith(".pkl") and len(f) == len(os.path.basename(path))):
+                try:
+                    os.remove(self.cache_dir + f)
+                except FileNotFoundError:
+                    pass #another worker removed it first
+        #Canvases are most of a stage and shrink about sixfold even at the fastest zlib level
+        tmp = tmp_name(path)
+        with open(tmp,"wb") as f:
+            f.write(zlib.compress(pickle.dumps(out, protocol=pickle.HIGHEST_PROTOCOL), 1))
+        os.replace(tmp, path)
+
+    def memo(self, name, func, *args, tag=""):
+        path = self.path(name, tag)
+        if path in self.memory:
+            return self.memory[path]
+        if self.cached(name, tag):
+            out = self.load(name, tag)
+        else:
+            out = func(*args)
+            self.store(name, out, tag)
+        self.memory[path] = out
+        return out
@@ -0,0 +1,60 @@
+from xml.sax.saxutils import escape
+
+from . import config
+
+
+#%%%SVG
+def svg_color(rgb):
+    return "#%02x%02x%02x" % tuple(int(c) for c in rgb)
+
+def svg_path(contours):
+    d = []
+    for c in contours:
+        pts = c.reshape(-1,2)
+        d.append("M" + "L".join(f"{x},{y}" for (x,y) in pts) + "Z")
+    return "".join(d)
+
+svg_anchors = {"l":"start","m":"middle","r":"end","a":"hanging","d":"text-after-edge"}
+
+def svg_text(x, y, anchor, text, size, fill):
+    return (f'<text x="{x}" y="{y}" font-size="{size}" text-anchor="{svg_anchors[anchor[0]]}" '
+            f'dominant-baseline="{svg_anchors.get(anchor[1],"middle")}" fill="{fill}" stroke="black" '
+            f'stroke-width="{max(1,size/8)}" paint-order="stroke">{escape(text)}</text>')
+
+def write_svg(path, shape, color, layers):
+    (h,w) = shape
+    contours = layers["isolines"]
+    out = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{w}" height="{h}" viewBox="0 0 {w} {h}" font-family="DF Curses 8x12, monospace">']
+    out.append(f'<rect width="{w}" height="{h}" fill="{svg_color(color[0])}"/>')
+    out.append('<g id="bands" fill-rule="evenodd">')
+    for i in sorted(color):
+        if(i == 0 or i not in contours): continue
+        out.append(f'<path fill="{svg_color(color[i])}" d="{svg_path(contours[i])}"/>')
+    out.append('</g>')
+    out.append(f'<g id="isolines" fill="none" stroke="{svg_color(config.topology_color[::-1])}" stroke-width="1">')
+    for i in sorted(color):
+        if(i <= 73 or i not in contours): continue
+        out.append(f'<path d="{svg_path(contours[i])}"/>')
+    out.append('</g>')
+    if(73 in contours):
+        out.append(f'<path id="coastline" fill="none" stroke="{svg_color(config.sea_level_color[::-1])}" stroke-width="1" d="{svg_path(contours[73])}"/>')
+    if(layers["rivers"]):
+        out.append(f'<path id="rivers" fill="{svg_color(color[72])}" stroke="{svg_color(color[72])}" stroke-width="1" d="{svg_path(layers["rivers"])}"/>')
+    if(layers["paths"]):
+        out.append(f'<path id="roads" fill="none" stroke="{svg_color(config.path_color)}" stroke-width="1" d="{svg_path(layers["paths"])}"/>')
+    out.append('<g id="borders" fill="none" stroke-width="2">')
+    for (contours,col) in layers["borders"]:
+        out.append(f'<path stroke="{svg_color(col)}" d="{svg_path(contours)}"/>')
+    out.append('</g>')
+    out.append('<g id="sites">')
+    for (x,y,size,col) in layers["points"]:
+        out.append(f'<circle cx="{x}" cy="{y}" r="{size}" fill="{svg_color(col[::-1])}"/>')
+    out.append('</g>')
+    out.append('<g id="labels">')
+    for label in layers["labels"]:
+        if(label[3] == ""): continue
+        out.append(svg_text(*label, svg_color(config.label_color)))
+    out.append('</g>')
+    out.append('</svg>')
+    with open(path,"w",encoding="utf-8") as f:
+        f.write("\n".join(out))
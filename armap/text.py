@@ -0,0 +1,105 @@
+import math
+from functools import lru_cache
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont, ImageFilter
+
+from . import config
+from .functions import px
+
+
+#%%%FONTS
+@lru_cache(maxsize=None)
+def load_font(size):
+    return ImageFont.truetype(config.font_file, size)
+
+#%%%GLYPH ATLAS
+class GlyphAtlas:
+    #DF_Curses_8x12 at one size, rasterized glyph by glyph so strings are measured and drawn with numpy blits
+    def __init__(self, font):
+        self.font = font
+        (self.ascent, self.descent) = font.getmetrics()
+        self.glyphs = {}
+        self.strings = {}
+        for c in range(32,127):
+            self.glyph(chr(c))
+
+    def glyph(self, ch):
+        if ch not in self.glyphs:
+            (x0,y0,x1,y1) = self.font.getbbox(ch)
+            img = Image.new("L",(max(x1-x0,1),max(y1-y0,1)))
+            ImageDraw.Draw(img).text((-x0,-y0),ch,font=self.font,fill=255)
+            self.glyphs[ch] = (np.asarray(img),x0,y0,x1,y1,self.font.getlength(ch))
+        return self.glyphs[ch]
+
+    def render(self, text):
+        #Mask of text from the "la" anchor, its offset, advance and the bbox draw.textbbox would give
+        if text not in self.strings:
+            pen = 0
+            placed = []
+            box = (0,0,0,0)
+            for ch in text:
+                (g,x0,y0,x1,y1,adv) = self.glyph(ch)
+                x = int(round(pen))
+                if placed:
+                    box = (min(box[0],x+x0),min(box[1],y0),max(box[2],x+x1),max(box[3],y1))
+                else:
+                    box = (x+x0,y0,x+x1,y1)
+                placed.append((g,x+x0,y0))
+                pen += adv
+            if placed:
+                left = min(p[1] for p in placed)
+                top = min(p[2] for p in placed)
+                right = max(p[1]+p[0].shape[1] for p in placed)
+                bottom = max(p[2]+p[0].shape[0] for p in placed)
+                mask = np.zeros((bottom-top,right-left),np.uint8)
+                for (g,x,y) in placed:
+                    sub = mask[y-top:y-top+g.shape[0],x-left:x-left+g.shape[1]]
+                    np.maximum(sub,g,out=sub)
+            else:
+                (mask,left,top) = (np.zeros((0,0),np.uint8),0,0)
+            self.strings[text] = (mask,left,top,pen,box)
+        return self.strings[text]
+
+    def origin(self, xy, text, anchor):
+        #Top left pixel of the rendered mask, snapped the same way ImageDraw.text snaps anchors
+        (mask,left,top,pen,box) = self.render(text)
+        ox = {"l":0,"m":-pen/2,"r":-pen}[anchor[0]]
+        oy = {"a":0,"m":-(self.ascent+self.descent)/2,"s":-self.ascent,"d":-(self.ascent+self.descent)}[anchor[1]]
+        x = int(xy[0]) + math.floor(ox) + (math.modf(xy[0])[0] >= 0.5) + left
+        y = int(xy[1]) + math.ceil(oy) + (math.modf(xy[1])[0] > 0.5) + top
+        return (x,y)
+
+atlases = {}
+
+def atlas(font):
+    if font.size not in atlases:
+        atlases[font.size] = GlyphAtlas(font)
+    return atlases[font.size]
+
+scratch_draw = ImageDraw.Draw(Image.new("L",(1,1)))
+
+def textbbox(text, font):
+    if config.glyph_atlas:
+        return atlas(font).render(text)[4]
+    return scratch_draw.textbbox((0,0), text, font)
+
+def blit_text(layer, xy, text, font, anchor):
+    mask = atlas(font).render(text)[0]
+    (x,y) = atlas(font).origin(xy, text, anchor)
+    (h,w) = layer.shape
+    (x0,y0,x1,y1) = (max(x,0),max(y,0),min(x+mask.shape[1],w),min(y+mask.shape[0],h))
+    if(x0 >= x1 or y0 >= y1):
+        return
+    sub = layer[y0:y1,x0:x1]
+    np.maximum(sub,mask[y0-y:y1-y,x0-x:x1-x],out=sub)
+
+def compose_labels(im, mask):
+    #Every label and the title share one shadow layer, so the map pays for a single blur and composite
+    mask = Image.fromarray(mask)
+    back = Image.new("RGBA", im.size)
+    back.paste(config.blur_color, (0,0), mask)
+    back = back.filter(ImageFilter.GaussianBlur(radius=px(3)))
+    back.alpha_composite(back)
+    back.alpha_composite(back)
+    back.paste(tuple(config.label_color)+(255,), (0,0), mask)
+    im.alpha_composite(back)
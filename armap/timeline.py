@@ -0,0 +1,177 @@
+import os
+import cv2 as cv
+import numpy as np
+from PIL import Image
+
+from . import config
+from .palettes import palette_dict, ent_colors
+from .layers import layer_cache
+from .legends_db import db_ownership_events
+from .render import find_files, load_legends, world_names, draw_base
+
+
+#%%%TIMELINE
+owner_event_types = ["created site","destroyed site","hf destroyed site","new site leader","reclaim site","site taken over"]
+terr_kernel = cv.getStructuringElement(cv.MORPH_ELLIPSE,(15,15))
+terr_reach = 8 + 7*(10+6) #site circle plus 10 dilations and 6 erosions by the 15x15 ellipse
+border_reach = 3 #canny plus the 3x3 dilate/erode of the borders
+
+def ownership_events(d_hevent):
+    #Same rules as the owner pass in generate, sorted once so the years can be replayed in order
+    events = []
+    for e in d_hevent:
+        ev = d_hevent[e]
+        if(ev["type"] in ["created site","reclaim site"]):
+            ruler = ev.get("civ_id","-1")
+        elif(ev["type"] in ["destroyed site","hf destroyed site"]):
+            ruler = -1
+        elif(ev["type"] in ["site taken over","new site leader"]):
+            ruler = ev.get("attacker_civ_id","-1")
+        else:
+            continue
+        events.append((int(ev["year"]), int(e), ev["site_id"], int(ruler)))
+    events.sort()
+    return [(year,s,ruler) for (year,i,s,ruler) in events]
+
+def pad_rect(rect, pad, shape):
+    (x0,y0,x1,y1) = rect
+    return (max(x0-pad,0),max(y0-pad,0),min(x1+pad,shape[1]),min(y1+pad,shape[0]))
+
+class Territories:
+    #Territory mask of every civ, redrawn only around the sites that changed hands
+    def __init__(self, shape, d_sites):
+        self.shape = shape
+        self.centers = {}
+        for s in d_sites:
+            ((x1,y1),(x2,y2)) = d_sites[s]["rect"]
+            self.centers[s] = (int((int(x1)+int(x2))/2),int((int(y1)+int(y2))/2))
+        self.owner = {}
+        self.sites = {}
+        self.masks = {}
+        self.colors = {}
+
+    def apply(self, site, ruler):
+        #Hands site to ruler (-1 razes it) and returns the rectangle whose pixels may have changed
+        old = self.owner.get(site,-1)
+        if(site not in self.centers or ruler == old):
+            return None
+        if(old != -1):
+            self.sites[old].discard(site)
+            del self.owner[site]
+        if(ruler != -1):
+            self.owner[site] = ruler
+            self.sites.setdefault(ruler,set()).add(site)
+            if(ruler not in self.masks):
+                self.masks[ruler] = np.zeros(self.shape,np.uint8)
+                self.colors[ruler] = len(self.colors) % len(ent_colors)
+        (x,y) = self.centers[site]
+        rect = pad_rect((x,y,x+1,y+1),terr_reach,self.shape)
+        for civ in (old,ruler):
+            if(civ != -1):
+                self.redraw(civ,rect)
+        return rect
+
+    def redraw(self, civ, rect):
+        #Every pixel of rect only depends on sites within terr_reach of it, so a patch that much bigger is exact
+        (x0,y0,x1,y1) = rect
+        (sx0,sy0,sx1,sy1) = pad_rect(rect,terr_reach,self.shape)
+        patch = np.zeros((sy1-sy0,sx1-sx0),np.uint8)
+        for s in self.sites[civ]:
+            (x,y) = self.centers[s]
+            if(sx0-8 <= x < sx1+8 and sy0-8 <= y < sy1+8):
+                cv.circle(patch,(x-sx0,y-sy0), 8, (255), -1)
+        patch = cv.dilate(patch, terr_kernel, iterations=10)
+        patch = cv.erode(patch, terr_kernel, iterations=6)
+        self.masks[civ][y0:y1,x0:x1] = patch[y0-sy0:y1-sy0,x0-sx0:x1-sx0]
+
+    def compose(self, frame, base, land, rect):
+        #Repaints rect of frame from the base map, territory fills first and borders on top like generate
+        (x0,y0,x1,y1) = pad_rect(rect,border_reach,self.shape)
+        (ex0,ey0,ex1,ey1) = pad_rect((x0,y0,x1,y1),border_reach,self.shape)
+        kernel = np.ones((3, 3), 'uint8')
+        canv = base[y0:y1,x0:x1].copy()
+        civs = sorted(self.masks,key=self.colors.get)
+        for civ in civs:
+            terr = cv.bitwise_and(self.masks[civ][y0:y1,x0:x1],land[y0:y1,x0:x1])
+            c = ent_colors[self.colors[civ]]
+            overlay = np.empty_like(canv)
+            overlay[:] = (c[2],c[1],c[0])
+            top = cv.addWeighted(canv,1-config.terr_alpha,overlay,config.terr_alpha,0)
+            np.copyto(canv,top,where=terr[:,:,None] > 0)
+        for civ in civs:
+            edges = cv.Canny(self.masks[civ][ey0:ey1,ex0:ex1],0,0)
+            edges = cv.dilate(edges, kernel, iterations=1)
+            edges = cv.erode(edges, kernel, iterations=1)
+            edges = cv.bitwise_and(edges[y0-ey0:y1-ey0,x0-ex0:x1-ex0],land[y0:y1,x0:x1])
+            c = ent_colors[self.colors[civ]]
+            canv[edges > 0] = (c[2],c[1],c[0])
+        frame[y0:y1,x0:x1] = canv
+
+class TimelineWriter:
+    def __init__(self, path, shape):
+        self.path = path
+        self.gif = []
+        self.video = None
+        if(config.timeline_format == "png"):
+            os.makedirs(path, exist_ok=True)
+        elif(config.timeline_format == "mp4"):
+            self.video = cv.VideoWriter(path + ".mp4", cv.VideoWriter_fourcc(*"mp4v"), config.timeline_fps, (shape[1],shape[0]))
+
+    def write(self, year, frame):
+        img = frame.copy()
+        (h,w) = img.shape[:2]
+        cv.putText(img, f"Year {year}", (10,h-10), cv.FONT_HERSHEY_SIMPLEX, 1, (0,0,0), 4, cv.LINE_AA)
+        cv.putText(img, f"Year {year}", (10,h-10), cv.FONT_HERSHEY_SIMPLEX, 1, (255,255,255), 2, cv.LINE_AA)
+        if(config.timeline_format == "png"):
+            cv.imwrite(f"{self.path}/{year:05d}.png", img)
+        elif(self.video is not None):
+            self.video.write(img)
+        else:
+            #A GIF is written in one go at the end, its frames are held quantized to a byte per pixel until then
+            self.gif.append(Image.fromarray(img[:,:,::-1]).quantize(256))
+
+    def close(self):
+        if(self.video is not None):
+            self.video.release()
+        elif self.gif:
+            self.gif[0].save(self.path + ".gif", save_all=True, append_images=self.gif[1:], duration=int(1000/config.timeline_fps), loop=0)
+
+def timeline(folder):
+    print("Beginning timeline of "+folder)
+    layer_cache.clear()
+    (file_path, fn, flegends, pops, wh) = find_files(folder)
+    (legends_db, d_regions, d_sites, d_entities, d_hevent, d_hcoll) = load_legends(file_path, flegends)
+    (worldtransname, worldname) = world_names(wh)
+
+    (base, t) = draw_base(fn, palette_dict[config.timeline_palette], {})
+    land = t[73].unpack()
+    if legends_db is not None:
+        events = db_ownership_events(legends_db, owner_event_types)
+    else:
+        events = ownership_events(d_hevent)
+    if(events == []):
+        print("No ownership events, nothing to animate.")
+        return
+
+    print(f"Replaying {len(events)} ownership events...")
+    terr = Territories(base.shape[:2], d_sites)
+    frame = base.copy()
+    out = TimelineWriter(f"{config.output_path}{worldtransname} - timeline", base.shape)
+    years = list(range(events[0][0], events[-1][0]+1, config.timeline_step))
+    if(years[-1] != events[-1][0]):
+        years.append(events[-1][0])
+    i = 0
+    for year in years:
+        dirty = []
+        while(i < len(events) and events[i][0] <= year):
+            (y,s,ruler) = events[i]
+            rect = terr.apply(s,ruler)
+            if(rect is not None):
+                dirty.append(rect)
+            i += 1
+        for rect in dirty:
+            terr.compose(frame, base, land, rect)
+        out.write(year, frame)
+    out.close()
+    print(f"Timeline of {worldtransname} saved, {len(years)} frames.")
+    print("---------------------------")
@@ -0,0 +1,71 @@
+import os
+import re
+import time
+import shutil
+from collections import deque
+
+from . import config
+from .render import generate
+
+
+#%%%WATCH
+required_layers = ["el","veg","bm","hyd","str"]
+
+def folder_snapshot(file_path):
+    #Size and mtime of every exported file, ignoring the caches armap writes itself
+    snap = {}
+    for f in os.scandir(file_path):
+        if(f.is_file() and not f.name.endswith((".npy",".sqlite",".tmp"))):
+            st = f.stat()
+            snap[f.name] = (st.st_size, st.st_mtime)
+    return snap
+
+def folder_complete(snap):
+    layers = set()
+    for f in snap:
+        m = re.search("([^-]*)\.(bmp|raw)",f)
+        if(m):
+            layers.add(m.group(1))
+    return (all(l in layers for l in required_layers)
+            and any(".xml" in f for f in snap)
+            and any("pops.txt" in f for f in snap)
+            and any("world_history.txt" in f for f in snap))
+
+def move_complete(folder):
+    os.makedirs(config.root_path + "Complete", exist_ok=True)
+    dest = config.root_path + "Complete/" + folder
+    n = 1
+    while os.path.exists(dest):
+        n += 1
+        dest = config.root_path + "Complete/" + f"{folder} ({n})"
+    shutil.move(config.root_path + folder, dest)
+
+def watch():
+    config.show_maps = False
+    print(f"Watching {config.root_path} for new map data...")
+    seen = {}
+    failed = {}
+    queue = deque()
+    while True:
+        now = time.time()
+        for folder in os.listdir(config.root_path):
+            if(folder == "Complete" or folder in queue or not os.path.isdir(config.root_path + folder)):
+                continue
+            snap = folder_snapshot(config.root_path + folder + "/")
+            if(folder not in seen or seen[folder][0] != snap):
+                seen[folder] = (snap, now)
+            elif(now - seen[folder][1] >= config.watch_settle and folder_complete(snap) and failed.get(folder) != snap):
+                print(folder,"is complete, queued.")
+                queue.append(folder)
+        while queue:
+            folder = queue.popleft()
+            try:
+                generate(folder)
+            except Exception as e:
+                print(f"ERROR: {folder} failed: {e!r}")
+                failed[folder] = seen[folder][0]
+                continue
+            move_complete(folder)
+            del seen[folder]
+            print(folder,"moved to Complete.")
+        time.sleep(config.watch_interval)
@@ -0,0 +1,40 @@
+#Times cold interpreter startup for the cheap entry points of armap, each run in a fresh process
+#Run from the repository root: python benchmarks/bench_startup.py [repeats]
+import os
+import sys
+import time
+import subprocess
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+cases = {
+    "python (baseline)": ["-c", "pass"],
+    "import armap": ["-c", "import armap"],
+    "armap palettes": ["-c", "import armap; armap.palette_dict"],
+    "armap.blue_conversion": ["-c", "import armap; armap.blue_conversion"],
+    "python -m armap --help": ["-m", "armap", "--help"],
+    "import armap.render": ["-c", "import armap.render"],
+}
+
+def run(args, repeats):
+    best = None
+    for _ in range(repeats):
+        t = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=root, check=True, stdout=subprocess.DEVNULL)
+        t = time.perf_counter() - t
+        best = t if best is None else min(best, t)
+    return best
+
+def heavy_modules(code):
+    #Heavy dependencies that a cheap entry point pulled in anyway
+    check = code + "; import sys; print(' '.join(m for m in ('cv2','numpy','PIL') if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", check], cwd=root, check=True, capture_output=True, text=True)
+    return out.stdout.split()
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for name, args in cases.items():
+        print(f"{name:28s} {run(args, repeats)*1000:8.1f} ms")
+    for code in ["import armap", "import armap; armap.palette_dict", "import armap; armap.blue_conversion"]:
+        loaded = heavy_modules(code)
+        print(f"{code!r} loads: {', '.join(loaded) or 'nothing heavy'}")
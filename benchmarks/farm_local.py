@@ -0,0 +1,102 @@
+#Runs several --farm workers on this machine against a copy of Map Data and checks that they drained the queue between them
+#Run from the repository root: python benchmarks/farm_local.py [--workers 3] [--worlds "Map Data"] [--synthetic N] [--kill] [--out farm]
+#With --kill the first worker is killed with SIGKILL as soon as it claims a job, the others have to take that job over once it goes stale
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import subprocess
+
+from parity import synthetic_world
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#Short heartbeats so a killed worker's job is handed on within seconds
+default_options = ["show_maps=False","farm_heartbeat=1","farm_stale=5"]
+
+driver = """
+import sys
+from PIL import Image
+Image.Image.show = lambda *a, **k: None
+sys.path.insert(0, sys.argv[1])
+from armap import config
+for kv in sys.argv[2:]:
+    k, v = kv.split("=", 1)
+    setattr(config, k, eval(v))
+from armap.__main__ import main
+main(["--farm"])
+"""
+
+def start_worker(workdir, options, log):
+    return subprocess.Popen([sys.executable, "-u", "-c", driver, root] + options, cwd=workdir,
+                            stdout=log, stderr=subprocess.STDOUT, text=True)
+
+def kill_on_claim(workdir, options):
+    #The first worker is let run until it has claimed a job, then killed without a chance to give it back
+    proc = start_worker(workdir, options, subprocess.PIPE)
+    for line in proc.stdout:
+        if line.startswith("Beginning"):
+            proc.kill()
+            print("Killed the first worker on: " + line.strip())
+            break
+    proc.wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that local --farm workers split a queue and finish every job.")
+    parser.add_argument("--workers", type=int, default=3, help="number of worker processes")
+    parser.add_argument("--synthetic", type=int, default=None, help="number of synthetic worlds to generate (default: 2 when no --worlds)")
+    parser.add_argument("--size", type=int, default=400, help="width and height of the synthetic worlds")
+    parser.add_argument("--worlds", help="a Map Data folder of sample worlds to render as well")
+    parser.add_argument("--kill", action="store_true", help="kill the first worker mid-job to check that its job is taken over")
+    parser.add_argument("--out", default="farm", help="folder for the maps and the workers' logs")
+    parser.add_argument("options", nargs="*", help="config overrides name=value given to every worker")
+    args = parser.parse_args()
+
+    options = default_options + args.options
+    with tempfile.TemporaryDirectory() as tmp:
+        #No Maps folder on purpose, the workers have to make it
+        map_data = f"{tmp}/Map Data"
+        os.makedirs(map_data)
+        shutil.copy(f"{root}/DF_Curses_8x12.ttf", tmp)
+        if args.worlds:
+            for w in os.listdir(args.worlds):
+                if w != "Complete" and os.path.isdir(f"{args.worlds}/{w}"):
+                    shutil.copytree(f"{args.worlds}/{w}", f"{map_data}/{w}", ignore=shutil.ignore_patterns("*.npy","*.sqlite","stages"))
+        for seed in range(args.synthetic if args.synthetic is not None else (0 if args.worlds else 2)):
+            synthetic_world(map_data, seed, args.size)
+
+        start = time.perf_counter()
+        if args.kill:
+            kill_on_claim(tmp, options)
+        logs = [open(f"{tmp}/worker{i}.log", "w") for i in range(args.workers)]
+        procs = [start_worker(tmp, options, log) for log in logs]
+        codes = [p.wait() for p in procs]
+        for log in logs:
+            log.close()
+        elapsed = time.perf_counter() - start
+
+        conn = sqlite3.connect(f"{map_data}/farm.sqlite")
+        jobs = conn.execute("SELECT world, palette, state, worker, tries FROM jobs ORDER BY world, rowid").fetchall()
+        conn.close()
+        maps = sorted(os.listdir(f"{tmp}/Maps")) if os.path.isdir(f"{tmp}/Maps") else []
+        shutil.rmtree(args.out, ignore_errors=True)
+        os.makedirs(args.out)
+        if maps:
+            shutil.copytree(f"{tmp}/Maps", f"{args.out}/maps")
+        for i in range(args.workers):
+            shutil.copy(f"{tmp}/worker{i}.log", args.out)
+
+    per_worker = {}
+    for (world, palette, state, worker, tries) in jobs:
+        if state == "done":
+            per_worker[worker] = per_worker.get(worker, 0) + 1
+        else:
+            print(f"{world} {palette}: {state} after {tries} tries")
+    for worker in sorted(per_worker):
+        print(f"{worker:32s} {per_worker[worker]:4d} jobs")
+    done = sum(per_worker.values())
+    print(f"{done} of {len(jobs)} jobs done and {len(maps)} maps written in {elapsed:.1f}s, worker exit codes {codes}")
+    sys.exit(0 if done == len(jobs) == len(maps) and not any(codes) else 1)
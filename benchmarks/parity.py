@@ -0,0 +1,238 @@
+#Renders the same worlds with a frozen reference revision and with the working tree, then diffs the maps and times each stage
+#Run from the repository root: python benchmarks/parity.py [--ref REV] [--synthetic N] [--worlds "Map Data"] [--tolerance T] [--out parity]
+#The reference is a git revision of this repository (the first commit by default), old maker.py scripts and armap packages both work
+#Labels are placed differently since the priority label placement, so against older revisions the pixels around the labels differ on purpose
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+import cv2 as cv
+from PIL import Image
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#Every check on, so the legends, territories, structures and labels are all compared
+#Caches and background loading are off so each stage is timed doing its full work in order
+default_options = ["site_check=True","territory_check=True","structure_check=True","other_labels_check=True",
+                   "show_maps=False","stage_cache=False","prefetch_depth=0"]
+
+#Run in the engine's own process, viewers are stubbed so nothing waits on a window
+driver_maker = """
+import re, sys
+from PIL import Image
+Image.Image.show = lambda *a, **k: None
+import cv2
+cv2.waitKey = lambda *a, **k: -1
+src = open(sys.argv[1], encoding="utf-8").read()
+for kv in sys.argv[2:]:
+    k, v = kv.split("=", 1)
+    src = re.sub(r"(?m)^%s = .*$" % k, lambda m: "%s = %s" % (k, v), src, count=1)
+exec(compile(src, "maker.py", "exec"), {"__name__": "__main__"})
+"""
+driver_package = """
+import sys
+from PIL import Image
+Image.Image.show = lambda *a, **k: None
+import cv2
+cv2.waitKey = lambda *a, **k: -1
+sys.path.insert(0, sys.argv[1])
+from armap import config
+for kv in sys.argv[2:]:
+    k, v = kv.split("=", 1)
+    if hasattr(config, k):
+        setattr(config, k, eval(v))
+from armap.__main__ import main
+main([])
+"""
+
+#%%SYNTHETIC WORLDS
+def synthetic_world(map_data, seed, size=400):
+    #A world folder with every map in the colors DF exports, random terrain, roads and sites
+    rng = np.random.default_rng(seed)
+    name = f"synthetic{seed}"
+    prefix = f"{map_data}/{name}/{name}-00250-01-01-"
+    os.makedirs(f"{map_data}/{name}", exist_ok=True)
+    (yy, xx) = np.mgrid[0:size, 0:size]
+    h = np.zeros((size,size), np.float32)
+    for _ in range(6):
+        (cx, cy, r) = rng.uniform(0, size, 2).tolist() + [rng.uniform(size/8, size/3)]
+        h += np.exp(-((xx-cx)**2 + (yy-cy)**2)/(2*r*r)) * rng.uniform(80, 200)
+    h = cv.GaussianBlur(h, (0,0), 3)
+    land = h > 90
+    el = np.zeros((size,size,3), np.uint8)
+    v = np.clip(h, 74, 255).astype(np.uint8)
+    el[land] = np.stack([v,v,v], -1)[land]
+    el[~land,0] = (h[~land]/90*98).astype(np.uint8) + 1
+    cv.imwrite(prefix + "el.bmp", el)
+    cv.imwrite(prefix + "veg.bmp", np.where(land, np.clip(h/2, 0, 255), 0).astype(np.uint8))
+    bm = np.full((size,size,3), (0,128,0), np.uint8)
+    for color in [(32,96,255),(0,255,255),(64,128,255),(255,255,0),(255,255,64)]:
+        (x, y) = rng.integers(0, size-60, 2)
+        bm[y:y+rng.integers(20,60), x:x+rng.integers(20,60)] = color
+    cv.imwrite(prefix + "bm.bmp", bm)
+    hyd = np.zeros((size,size,3), np.uint8)
+    for color in [(255,128,0),(255,160,0),(255,224,0)]:
+        pts = rng.integers(0, size, (4,2)).astype(np.int32)
+        cv.polylines(hyd, [pts], False, color, 1)
+    cv.imwrite(prefix + "hyd.bmp", hyd)
+    st = np.zeros((size,size,3), np.uint8)
+    for color in [(20,127,150),(192,192,192),(20,127,150)]:
+        pts = rng.integers(0, size, (5,2)).astype(np.int32)
+        cv.polylines(st, [pts], False, color, 1)
+    for color in [(0,128,255),(0,255,0),(0,128,0),(255,255,255)]:
+        (x, y) = rng.integers(0, size-12, 2)
+        st[y:y+10, x:x+10] = color
+    cv.imwrite(prefix + "str.bmp", st)
+
+    types = ["town","castle","hamlet","fortress","tower","dark fortress","cave"]
+    civs = [1,2,3,4]
+    x = ['<?xml version="1.0" encoding="UTF-8"?>','<df_world>','<regions>']
+    x += [f'<region><id>{i}</id><name>region{i}</name><type>Grassland</type></region>' for i in range(3)]
+    x.append('</regions><sites>')
+    sites = []
+    for i in range(int(size/12)):
+        (px, py) = rng.integers(20, size-20, 2).tolist()
+        sites.append(i)
+        x.append(f'<site><id>{i}</id><type>{types[i%len(types)]}</type><name>site{i}name</name><coords>{px//16},{py//16}</coords><rectangle>{px-3},{py-3}:{px+3},{py+3}</rectangle></site>')
+    x.append('</sites><entities>')
+    x += [f'<entity><id>{c}</id><name>civ{c}</name></entity>' for c in civs + [100+c for c in civs]]
+    x.append('</entities><historical_events>')
+    eid = 0
+    for s in sites:
+        civ = civs[s % len(civs)]
+        x.append(f'<historical_event><id>{eid}</id><year>{10+s}</year><type>created site</type><civ_id>{civ}</civ_id><site_civ_id>{100+civ}</site_civ_id><site_id>{s}</site_id></historical_event>')
+        eid += 1
+    for s in rng.choice(sites, len(sites)//4, replace=False).tolist():
+        civ = civs[(s+1) % len(civs)]
+        x.append(f'<historical_event><id>{eid}</id><year>{200+eid}</year><type>site taken over</type><attacker_civ_id>{civ}</attacker_civ_id><new_site_civ_id>{100+civ}</new_site_civ_id><site_id>{s}</site_id></historical_event>')
+        eid += 1
+    x.append('</historical_events><historical_event_collections>')
+    x.append('<historical_event_collection><id>0</id><start_year>200</start_year><end_year>-1</end_year><type>war</type><name>the war</name><aggressor_ent_id>101</aggressor_ent_id><defender_ent_id>2</defender_ent_id></historical_event_collection>')
+    x.append('</historical_event_collections></df_world>')
+    with open(prefix + "legends.xml", "w") as f:
+        f.write("\n".join(x))
+    with open(prefix + "world_history.txt", "w", encoding="cp850") as f:
+        f.write(f"Synthetic World {seed}\nSynthetic {seed}\n")
+    with open(prefix + "sites_and_pops.txt", "w", encoding="cp850") as f:
+        for s in sites:
+            f.write(f"{s}: site{s}name, trans{s}, {types[s%len(types)]}\n{int(rng.integers(0,3000))} dwarves\n")
+        f.write("Outdoor Animal Populations\n")
+    return name
+
+#%%ENGINES
+def checkout(rev, dest):
+    #The reference engine is the tree at rev, unpacked once and never touched again
+    archive = subprocess.run(["git","archive",rev], cwd=root, check=True, capture_output=True).stdout
+    subprocess.run(["tar","-x","-C",dest], input=archive, check=True)
+    return dest
+
+def engine_command(tree, options):
+    if os.path.exists(f"{tree}/armap/__main__.py"):
+        return [sys.executable, "-u", "-c", driver_package, tree] + options
+    return [sys.executable, "-u", "-c", driver_maker, f"{tree}/maker.py"] + options
+
+def run_engine(tree, map_data, workdir, options):
+    #Renders every world in its own copy of map_data and times the progress messages as they are printed
+    shutil.copytree(map_data, f"{workdir}/Map Data")
+    os.makedirs(f"{workdir}/Maps", exist_ok=True)
+    shutil.copy(f"{root}/DF_Curses_8x12.ttf", workdir)
+    stages = {}
+    stage = "startup"
+    start = last = time.perf_counter()
+    proc = subprocess.Popen(engine_command(tree, options), cwd=workdir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    for line in proc.stdout:
+        now = time.perf_counter()
+        stages[stage] = stages.get(stage, 0) + now - last
+        last = now
+        line = line.strip()
+        if line.endswith("..."):
+            stage = line
+    proc.wait()
+    stages[stage] = stages.get(stage, 0) + time.perf_counter() - last
+    if proc.returncode != 0:
+        raise RuntimeError(f"{tree} failed rendering in {workdir}")
+    return (stages, time.perf_counter() - start)
+
+#%%DIFF
+def load_map(path):
+    return np.asarray(Image.open(path).convert("RGBA")).astype(np.int16)
+
+def diff_maps(ref, new, tolerance, out):
+    #Exact and tolerance pixel counts for every map the reference drew, with a heatmap of each map that moved
+    rows = []
+    for f in sorted(os.listdir(ref)):
+        if not f.endswith((".png",".webp")):
+            continue
+        if not os.path.exists(f"{new}/{f}"):
+            rows.append((f, None, None, None))
+            continue
+        (a, b) = (load_map(f"{ref}/{f}"), load_map(f"{new}/{f}"))
+        if a.shape != b.shape:
+            rows.append((f, -1, -1, -1))
+            continue
+        d = np.abs(a-b).max(axis=2)
+        rows.append((f, int((d > 0).sum()), int((d > tolerance).sum()), int(d.max())))
+        if d.any():
+            heat = cv.applyColorMap(np.uint8(np.clip(d*(255/max(int(d.max()),1)),0,255)), cv.COLORMAP_INFERNO)
+            cv.imwrite(f"{out}/{os.path.splitext(f)[0]} - diff.png", heat)
+    return rows
+
+#%%REPORT
+def report(rows, ref_stages, new_stages, ref_total, new_total, tolerance):
+    print(f"{'map':48s} {'exact':>8s} {'>'+str(tolerance):>8s} {'max':>5s}")
+    for (f, exact, loose, peak) in rows:
+        if exact is None:
+            print(f"{f:48s} {'missing':>8s}")
+        elif exact == -1:
+            print(f"{f:48s} {'size':>8s}")
+        else:
+            print(f"{f:48s} {exact:8d} {loose:8d} {peak:5d}")
+    print()
+    print(f"{'stage':36s} {'ref s':>8s} {'new s':>8s} {'speedup':>8s}")
+    for stage in list(ref_stages) + [s for s in new_stages if s not in ref_stages]:
+        (a, b) = (ref_stages.get(stage), new_stages.get(stage))
+        speed = f"{a/b:7.2f}x" if a and b else ""
+        print(f"{stage:36s} {a if a is not None else float('nan'):8.3f} {b if b is not None else float('nan'):8.3f} {speed:>8s}")
+    print(f"{'total':36s} {ref_total:8.3f} {new_total:8.3f} {ref_total/new_total:7.2f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the maps and stage timings of a reference revision and the working tree.")
+    parser.add_argument("--ref", help="git revision of the reference engine (default: the first commit)")
+    parser.add_argument("--synthetic", type=int, default=None, help="number of synthetic worlds to generate (default: 1 when no --worlds)")
+    parser.add_argument("--size", type=int, default=400, help="width and height of the synthetic worlds")
+    parser.add_argument("--worlds", help="a Map Data folder of sample worlds to render as well")
+    parser.add_argument("--tolerance", type=int, default=8, help="per channel difference still counted as matching")
+    parser.add_argument("--out", default="parity", help="folder for the diff heatmaps and both engines' maps")
+    parser.add_argument("options", nargs="*", help="config overrides name=value given to both engines")
+    args = parser.parse_args()
+
+    ref = args.ref or subprocess.run(["git","rev-list","--max-parents=0","HEAD"], cwd=root, check=True, capture_output=True, text=True).stdout.split()[0]
+    options = default_options + args.options
+    with tempfile.TemporaryDirectory() as tmp:
+        map_data = f"{tmp}/Map Data"
+        os.makedirs(map_data)
+        if args.worlds:
+            for w in os.listdir(args.worlds):
+                if w != "Complete" and os.path.isdir(f"{args.worlds}/{w}"):
+                    shutil.copytree(f"{args.worlds}/{w}", f"{map_data}/{w}", ignore=shutil.ignore_patterns("*.npy","*.sqlite","stages"))
+        for seed in range(args.synthetic if args.synthetic is not None else (0 if args.worlds else 1)):
+            synthetic_world(map_data, seed, args.size)
+        print(f"Reference {ref[:12]} against the working tree on {len(os.listdir(map_data))} worlds")
+
+        tree = checkout(ref, tempfile.mkdtemp(dir=tmp))
+        os.makedirs(f"{tmp}/ref")
+        os.makedirs(f"{tmp}/new")
+        (ref_stages, ref_total) = run_engine(tree, map_data, f"{tmp}/ref", options)
+        (new_stages, new_total) = run_engine(root, map_data, f"{tmp}/new", options)
+
+        shutil.rmtree(args.out, ignore_errors=True)
+        os.makedirs(args.out)
+        rows = diff_maps(f"{tmp}/ref/Maps", f"{tmp}/new/Maps", args.tolerance, args.out)
+        shutil.copytree(f"{tmp}/ref/Maps", f"{args.out}/ref")
+        shutil.copytree(f"{tmp}/new/Maps", f"{args.out}/new")
+    report(rows, ref_stages, new_stages, ref_total, new_total, args.tolerance)
+    sys.exit(1 if any(r[2] != 0 for r in rows) else 0)
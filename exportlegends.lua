@@ -21,6 +21,10 @@ Valid values for ``OPTION`` are:
 :sites:  Exports all available site maps
 :maps:   Exports all seventeen detailed maps
 :all:    Equivalent to calling all of the above, in that order
+:armaps: Exports the legends xml and the five detailed maps armap needs
+:armaps-raw: Like ``armaps``, but writes the map data as raw arrays instead of BMPs
+:armaps-lite: Like ``armaps``, but keeps only the regions, sites, entities, site ownership
+             events and wars armap reads from the legends xml
 
 ``FOLDER_NAME``, if specified, is the name of the folder where all the files
 will be saved. This defaults to the ``legends-regionX-YYYYY-MM-DD`` format. A path is
@@ -77,6 +81,9 @@ local MAPS = {
     "Diplomacy",
 }
 
+local XML_GZIP = false -- write the xml exports as .xml.gz, needs gzip on the PATH
+local XML_BUFFER = 1024*1024 -- bytes of xml collected before each write
+
 local ARMAPS = {
     "Elevations including lake and ocean floors",
     "Biome",
@@ -176,6 +183,59 @@ setmetatable(df_enums, {
     __newindex = function() error('read-only') end
 })
 
+-- Collects the many small writes of the xml export and hands them to the file in large chunks
+-- close() returns false when the gzip behind a .gz export failed, the broken .gz is removed
+function buffered_file(file, gz_path)
+    local buffer = {file = file, gz_path = gz_path, parts = {}, size = 0}
+    function buffer:write(str)
+        self.parts[#self.parts+1] = str
+        self.size = self.size + #str
+        if self.size >= XML_BUFFER then
+            self:flush()
+        end
+    end
+    function buffer:flush()
+        self.file:write(table.concat(self.parts))
+        self.parts = {}
+        self.size = 0
+    end
+    function buffer:close()
+        self:flush()
+        local ok = self.file:close()
+        if not ok and self.gz_path then
+            os.remove(self.gz_path)
+            dfhack.printerr("gzip failed on "..self.gz_path..", it will be written uncompressed.")
+            return false
+        end
+        return true
+    end
+    return buffer
+end
+
+-- Opens an xml export for writing, piped through gzip into filename.gz when XML_GZIP is set
+function open_xml(filename)
+    if XML_GZIP then
+        -- popen hands back a pipe even when there is no gzip to run, so it is asked for its version first
+        local null = package.config:sub(1,1) == "\\" and "NUL" or "/dev/null"
+        if os.execute('gzip --version > '..null..' 2>&1') then
+            local file = io.popen('gzip -c > "'..filename..'.gz"', 'w')
+            if file then
+                return buffered_file(file, dfhack.filesystem.getcwd().."/"..filename..".gz")
+            end
+        end
+        dfhack.printerr("Could not start gzip, writing "..filename.." uncompressed.")
+    end
+    local file = io.open(filename, 'w')
+    return file and buffered_file(file)
+end
+
+-- Compresses an xml DF wrote itself, the original is kept if gzip fails
+function gzip_xml(filename)
+    if XML_GZIP and not os.execute('gzip -f "'..filename..'"') then
+        dfhack.printerr("Could not compress "..filename)
+    end
+end
+
 -- prints a line with the value inside the tags if the value isn't -1. Intended to be used
 -- for fields where -1 is a known "no info" value. Relies on 'indentation' being set to indicate
 -- the current indentation level
@@ -194,7 +254,7 @@ function export_more_legends_xml()
         qerror('Could not move into the save folder.')
     end
     local filename = df.global.world.cur_savegame.save_dir.."-"..get_world_date_str().."-legends_plus.xml"
-    local file = io.open(filename, 'w')
+    local file = open_xml(filename)
     move_back_to_main_folder()
     if not file then
       qerror("could not open file: " .. filename)
@@ -1053,7 +1113,10 @@ function export_more_legends_xml()
     file:write("</dance_forms>\n")
 
     file:write("</df_world>\n")
-    file:close()
+    if not file:close() then
+        XML_GZIP = false
+        return export_more_legends_xml()
+    end
 
     local problem_elements_exist = false
     for i, element in pairs (problem_elements) do
@@ -1079,6 +1142,7 @@ function export_legends_info()
     gui.simulateInput(vs, 'LEGENDS_EXPORT_MAP')
     print('    Exporting:  Legends xml')
     gui.simulateInput(vs, 'LEGENDS_EXPORT_XML')
+    gzip_xml(df.global.world.cur_savegame.save_dir.."-"..get_world_date_str().."-legends.xml")
     move_back_to_main_folder() -- Move back out of the save folder
     print("    Exporting:  Extra legends_plus xml")
     export_more_legends_xml()
@@ -1093,6 +1157,103 @@ function export_no_plus()
     gui.simulateInput(vs, 'LEGENDS_EXPORT_MAP')
     print('    Exporting:  Legends xml')
     gui.simulateInput(vs, 'LEGENDS_EXPORT_XML')
+    gzip_xml(df.global.world.cur_savegame.save_dir.."-"..get_world_date_str().."-legends.xml")
+    move_back_to_main_folder() -- Move back out of the save folder
+end
+
+-- The records armap reads from the legends, with the fields it uses and the types it keeps
+local LITE_SECTIONS = {
+    regions = {fields = {id = true, name = true, type = true}},
+    sites = {fields = {id = true, type = true, name = true, coords = true, rectangle = true}},
+    entities = {fields = {id = true, name = true}},
+    historical_events = {
+        fields = {id = true, year = true, type = true, site_id = true, civ_id = true, site_civ_id = true,
+                  attacker_civ_id = true, defender_civ_id = true, new_site_civ_id = true},
+        types = {["created site"] = true, ["destroyed site"] = true, ["hf destroyed site"] = true,
+                 ["new site leader"] = true, ["reclaim site"] = true, ["site taken over"] = true},
+    },
+    historical_event_collections = {
+        fields = {id = true, type = true, name = true, start_year = true, end_year = true,
+                  aggressor_ent_id = true, defender_ent_id = true},
+        types = {war = true},
+    },
+}
+
+-- Copies those records out of DF's legends xml into file, the xml has one element per line
+function write_lite_legends(source, file)
+    local outer, name, section, record, depth, keep = 0
+    for line in io.lines(source) do
+        local open = line:match("^%s*<([%w_]+)>%s*$")
+        local close = line:match("^%s*</([%w_]+)>%s*$")
+        local tag, value = line:match("^%s*<([%w_]+)>(.*)</[%w_]+>%s*$")
+        if record then
+            if close and depth == 0 then
+                record[#record+1] = line
+                if keep then
+                    file:write(table.concat(record, "\n").."\n")
+                end
+                record = nil
+            elseif open then
+                depth = depth + 1
+            elseif close then
+                depth = depth - 1
+            elseif depth == 0 and tag and section.fields[tag] then
+                record[#record+1] = line
+                if tag == "type" and section.types and not section.types[value] then
+                    keep = false
+                end
+            end
+        elseif section then
+            if close == name then
+                file:write(line.."\n")
+                section = nil
+            elseif open then
+                record, depth, keep = {line}, 0, true
+            end
+        elseif open and outer == 1 and LITE_SECTIONS[open] then
+            name, section = open, LITE_SECTIONS[open]
+            file:write(line.."\n")
+        else
+            -- Sections armap does not read are skipped whole, nested tags included
+            if line:match("^<%?xml") or (open and outer == 0) or (close and outer == 1) or (tag and outer == 1 and LITE_SECTIONS[tag]) then
+                file:write(line.."\n")
+            end
+            if open then
+                outer = outer + 1
+            elseif close then
+                outer = outer - 1
+            end
+        end
+    end
+end
+
+-- Legends xml cut down to what armap reads (key: 'armaps-lite')
+function export_lite_legends()
+    -- Move into the save folder
+    if not move_to_save_folder() then
+        qerror('Could not move into the save folder.')
+    end
+    local prefix = df.global.world.cur_savegame.save_dir.."-"..get_world_date_str()
+    print('    Exporting:  World map/gen info')
+    gui.simulateInput(vs, 'LEGENDS_EXPORT_MAP')
+    print('    Exporting:  Legends xml')
+    gui.simulateInput(vs, 'LEGENDS_EXPORT_XML')
+    print('    Exporting:  Lite legends xml')
+    local file = open_xml(prefix.."-legends_lite.xml")
+    if not file then
+        qerror("could not open file: "..prefix.."-legends_lite.xml")
+    end
+    write_lite_legends(prefix.."-legends.xml", file)
+    if not file:close() then
+        XML_GZIP = false
+        file = open_xml(prefix.."-legends_lite.xml")
+        if not file then
+            qerror("could not open file: "..prefix.."-legends_lite.xml")
+        end
+        write_lite_legends(prefix.."-legends.xml", file)
+        file:close()
+    end
+    os.remove(prefix.."-legends.xml")
     move_back_to_main_folder() -- Move back out of the save folder
 end
 
@@ -1222,6 +1383,83 @@ function export_armaps()
     )
 end
 
+-- Raw world tile export for armap (key: 'armaps-raw'), see armap/rawmaps.py for the reader
+-- Writes the classes behind the detailed maps straight from the world data instead of driving the export screen
+local RAW_SCALE = 16 -- pixels per world tile in the detailed maps
+local RAW_RIVER_FLOW = {20000, 10000, 5000, 1000, 0} -- lowest flow of a major river, river, minor river, stream and brook
+local RAW_CONSTRUCTION = {TUNNEL = 3, BRIDGE = 7, ROAD = 8, WALL = 9} -- armap structure classes, stone is not known here
+
+function raw_header(dtype, w, h)
+    return string.pack("<c4BBBI2I2", "ARMR", 1, dtype, RAW_SCALE, w, h)
+end
+
+-- Every layer as a flat 1-indexed array, row by row. Only reads the tables passed in so it can run on a mocked world.
+function raw_layers(world_data, biome_of, construction_types)
+    local w, h = world_data.world_width, world_data.world_height
+    local layers = {el = {}, veg = {}, bm = {}, hyd = {}, str = {}}
+    for y = 0, h-1 do
+        for x = 0, w-1 do
+            local i = y*w + x + 1
+            local tile = world_data.region_map[x]:_displace(y)
+            layers.el[i] = tile.elevation
+            layers.veg[i] = tile.vegetation
+            layers.bm[i] = biome_of(x, y)
+            layers.hyd[i] = tile.flags.is_lake and 1 or 0
+            layers.str[i] = 0
+        end
+    end
+    for _, river in ipairs(world_data.rivers) do
+        for k, x in ipairs(river.path.x) do
+            local y = river.path.y[k]
+            local i = y*w + x + 1
+            if layers.hyd[i] == 0 then
+                for class, flow in ipairs(RAW_RIVER_FLOW) do
+                    if river.flow[k] >= flow then
+                        layers.hyd[i] = class + 2
+                        break
+                    end
+                end
+            end
+        end
+    end
+    for _, construction in ipairs(world_data.constructions.list) do
+        local class = RAW_CONSTRUCTION[construction_types[construction:getType()]]
+        if class then
+            for k, x in ipairs(construction.square_pos.x) do
+                layers.str[construction.square_pos.y[k]*w + x + 1] = class
+            end
+        end
+    end
+    return layers, w, h
+end
+
+function write_raw(path, dtype, values, w, h)
+    local file = io.open(path, "wb")
+    if not file then
+        qerror("could not open file: " .. path)
+    end
+    file:write(raw_header(dtype, w, h))
+    local row = "<" .. string.rep(dtype == 2 and "i2" or "B", w)
+    for y = 0, h-1 do
+        file:write(string.pack(row, table.unpack(values, y*w + 1, y*w + w)))
+    end
+    file:close()
+end
+
+function export_raw_armaps()
+    -- Move into the save folder
+    if not move_to_save_folder() then
+        qerror('Could not move into the save folder.')
+    end
+    local prefix = df.global.world.cur_savegame.save_dir .. "-" .. get_world_date_str()
+    local layers, w, h = raw_layers(df.global.world.world_data, dfhack.maps.getBiomeType, df.world_construction_type)
+    for _, key in ipairs({"el", "veg", "bm", "hyd", "str"}) do
+        print('    Exporting raw map: ' .. key)
+        write_raw(prefix .. "-" .. key .. ".raw", key == "el" and 2 or 1, layers[key], w, h)
+    end
+    move_back_to_main_folder() -- Move back out of the save folder
+end
+
 -- Export the maps of all the sites (cities, towns,...) (key: 'sites', 'p')
 function export_site_maps()
     local vs = dfhack.gui.getCurViewscreen()
@@ -1292,6 +1530,12 @@ if dfhack.gui.getCurFocus() == "legends" or dfhack.gui.getCurFocus() == "dfhack/
     elseif args[1] == "armaps" then
         export_no_plus()
         export_armaps()
+    elseif args[1] == "armaps-lite" then
+        export_lite_legends()
+        export_armaps()
+    elseif args[1] == "armaps-raw" then
+        export_no_plus()
+        export_raw_armaps()
     elseif args[1] == "test" then
         export_test()
     else
@@ -0,0 +1,75 @@
+-- Runs "exportlegends armaps-raw" on a mocked 3x2 world, writing its .raw maps into the current folder
+-- Usage: lua raw_export_mock.lua path/to/exportlegends.lua (test_raw_export.py checks the files with armap's reader)
+local script_path = ...
+
+local elevation = {{50, 100, 250}, {99, 400, 120}}
+local vegetation = {{0, 40, 100}, {10, 70, 100}}
+local biomes = {{1, 2, 24}, {25, 26, 29}}
+
+local region_map = {}
+for x = 0, 2 do
+    region_map[x] = {_displace = function(self, y)
+        return {elevation = elevation[y+1][x+1], vegetation = vegetation[y+1][x+1], flags = {is_lake = x == 0 and y == 1}}
+    end}
+end
+
+local function construction(kind, xs, ys)
+    return {getType = function() return kind end, square_pos = {x = xs, y = ys}}
+end
+
+df = {
+    global = {
+        cur_year = 250,
+        world = {
+            cur_savegame = {save_dir = "region1"},
+            world_data = {
+                world_width = 3,
+                world_height = 2,
+                region_map = region_map,
+                rivers = {{path = {x = {1, 2, 0}, y = {0, 1, 1}}, flow = {25000, 3000, 30000}}},
+                constructions = {list = {construction(0, {0}, {0}), construction(1, {2}, {1}), construction(2, {1}, {1})}},
+            },
+        },
+    },
+    world_construction_type = {[0] = "ROAD", [1] = "TUNNEL", [2] = "NONE"},
+}
+
+dfhack = {
+    gui = {
+        getCurViewscreen = function() return {} end,
+        getCurFocus = function() return "legends" end,
+    },
+    world = {
+        ReadCurrentMonth = function() return 0 end,
+        ReadCurrentDay = function() return 1 end,
+    },
+    filesystem = {
+        restore_cwd = function() return true end,
+        getcwd = function() return "." end,
+        chdir = function() return true end,
+        isfile = function() return false end,
+        exists = function() return true end,
+        mkdir = function() return true end,
+    },
+    maps = {
+        getBiomeType = function(x, y) return biomes[y+1][x+1] end,
+    },
+    printerr = print,
+}
+
+function qerror(msg)
+    error(msg, 0)
+end
+
+-- The legends xml half of the export only presses DF's keys, which do nothing here
+local lua_require = require
+function require(name)
+    if name == "gui" then
+        return {simulateInput = function() end}
+    elseif name == "gui.script" then
+        return {}
+    end
+    return lua_require(name)
+end
+
+assert(loadfile(script_path))("armaps-raw", ".")
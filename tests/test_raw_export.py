@@ -0,0 +1,46 @@
+import os
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from armap.rawmaps import read_raw, raw_layer
+
+
+#%%%RAW EXPORT
+#exportlegends armaps-raw run on the mocked world of raw_export_mock.lua, then read back as armap reads it
+here = os.path.dirname(os.path.abspath(__file__))
+script = os.path.join(here, "..", "exportlegends.lua")
+mock = os.path.join(here, "raw_export_mock.lua")
+expected = {
+    "el": [[50,100,250],[99,400,120]],
+    "veg": [[0,40,100],[10,70,100]],
+    "bm": [[1,2,24],[25,26,29]],
+    "hyd": [[0,3,0],[1,0,6]],   #lake first, then a major river and a stream by flow
+    "str": [[8,0,0],[0,0,3]],   #road and tunnel, the unknown construction is left out
+}
+
+def run_mock(folder):
+    #Any Lua 5.3+ on the PATH (string.pack), or lupa's bundled one
+    lua = next((shutil.which(n) for n in ["lua5.4","lua5.3","lua"] if shutil.which(n)), None)
+    if lua is not None:
+        subprocess.run([lua, mock, script], cwd=folder, check=True)
+        return
+    lupa = pytest.importorskip("lupa")
+    cwd = os.getcwd()
+    os.chdir(folder)
+    try:
+        with open(mock) as f:
+            lupa.LuaRuntime().execute(f.read(), script)
+    finally:
+        os.chdir(cwd)
+
+def test_raw_round_trip(tmp_path):
+    run_mock(tmp_path)
+    for key, values in expected.items():
+        (data, scale) = read_raw(tmp_path / f"region1-00250-01-01-{key}.raw")
+        assert scale == 16
+        assert data.dtype == (np.int16 if key == "el" else np.uint8)
+        assert data.tolist() == values
+        assert raw_layer(tmp_path / f"region1-00250-01-01-{key}.raw", key).shape[:2] == (32, 48)